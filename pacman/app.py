@@ -1,12 +1,76 @@
+import argparse
+import asyncio
+import json
 import logging
 import os
-from game.game_state import GameState
-from game.pacman import Pacman
+from auxil import startup_timing
+
+# imports are timed as the first startup phases
+with startup_timing.phase('import pygame'):
+    import pygame
+with startup_timing.phase('import game modules'):
+    from auxil import asset_bundle, log_setup
+    from game.game_state import GameState
+    from game.input_recording import InputRecording, RecordingInput
+    from game.input_source import KeyboardInput, ScriptedInput
+    from game.multiplayer import GameClient, GameServer, parse_address
+    from game.pacman import Pacman
+
+
+def parse_args() -> argparse.Namespace:
+    """ Parses the command line arguments. """
+
+    parser = argparse.ArgumentParser(description='Pacman game.')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without a window as fast as possible')
+    parser.add_argument('--script', metavar='PATH',
+                        help='read keys from an input script, '
+                             'required with --headless')
+    parser.add_argument('--record', metavar='PATH',
+                        help='record the keys of every tick into a file')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='replay a recording headless and check its '
+                             'final state')
+    parser.add_argument('--bundle', metavar='PATH',
+                        help='load the config and textures from an asset '
+                             'bundle built by auxil.asset_bundle')
+    parser.add_argument('--telemetry', action='store_true',
+                        help='time the phases of every frame, see the '
+                             'telemetry section of defaults.json')
+    parser.add_argument('--watch', action='store_true',
+                        help='reload changed assets, defaults.json and '
+                             'paths.json while running')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                        help='run a multiplayer game server, players join '
+                             'with --connect')
+    parser.add_argument('--connect', metavar='[HOST:]PORT',
+                        help='join the multiplayer game server at '
+                             'HOST:PORT')
+    parser.add_argument('--startup-timing', metavar='PATH', nargs='?',
+                        const='-',
+                        default=os.environ.get(startup_timing.ENV_VAR),
+                        help='report the time of every startup phase on '
+                             'exit into PATH, standard output by default')
+    args = parser.parse_args()
+    if args.replay and (args.script or args.record):
+        parser.error('--replay cannot be combined with --script or --record')
+    if (args.serve or args.connect) and (args.replay or args.record):
+        parser.error('--serve and --connect cannot be combined with '
+                     '--replay or --record')
+    if args.serve and args.connect:
+        parser.error('--serve cannot be combined with --connect')
+    if args.headless and not args.script:
+        parser.error('--headless requires --script')
+    return args
 
 
 def main():
     """ Main function. """
 
+    args = parse_args()
+    if args.startup_timing:
+        startup_timing.report_at_exit(args.startup_timing)
+
     # get CWD
     BASE_DIR = os.getcwd()
 
@@ -14,19 +78,100 @@ def main():
     if os.path.exists(os.path.join(BASE_DIR, 'log')):
         os.remove(os.path.join(BASE_DIR, 'log'))
 
-    # init logger
-    logging.basicConfig(filename='log', filemode='w+',
-                        encoding='utf-8', level=logging.DEBUG)
+    # init logger, frame-level events are only kept in memory unless
+    # logging in the background is turned off; defaults are read without
+    # logging as logging is not set up yet
+    if args.bundle:
+        log_defaults = asset_bundle.read_defaults(args.bundle)['logging']
+    else:
+        with open(os.path.join(BASE_DIR, 'defaults.json'), 'r',
+                  encoding='utf-8') as defaults_file:
+            log_defaults = json.load(defaults_file)['logging']
+    log_setup.init_logging('log', log_defaults['background'],
+                           log_defaults['frame_buffer'],
+                           log_defaults['frame_sample'])
+
+    # multiplayer games run on the server, clients only draw them
+    if args.serve:
+        server = GameServer(BASE_DIR)
+        startup_timing.stop()
+        try:
+            asyncio.run(server.serve(*parse_address(args.serve)))
+        except KeyboardInterrupt:
+            logging.info('Server stopped.')
+        return
+    if args.connect:
+        input_source = ScriptedInput.from_file(args.script)\
+            if args.script else KeyboardInput()
+        client = GameClient(BASE_DIR, input_source, headless=args.headless)
+        startup_timing.stop()
+        asyncio.run(client.run(*parse_address(args.connect)))
+        return
+
+    # replays run headless with the seed and level of the recording
+    replay = InputRecording.load(args.replay) if args.replay else None
 
     # init game objects
-    pacman = Pacman(GameState.INTRO, BASE_DIR)
-    pacman.init_gfx()
-    pacman.load_textures()
-    pacman.spawn_default()
-    pacman.draw()
-
-    # run game
-    pacman.run()
+    with startup_timing.phase('Pacman'):
+        if replay:
+            pacman = Pacman(GameState.INTRO, BASE_DIR, headless=True,
+                            seed=replay.seed, level=replay.level,
+                            bundle_path=args.bundle)
+        else:
+            pacman = Pacman(GameState.INTRO, BASE_DIR,
+                            headless=args.headless,
+                            bundle_path=args.bundle)
+    with startup_timing.phase('init_gfx'):
+        pacman.init_gfx()
+    with startup_timing.phase('load_textures'):
+        pacman.load_textures()
+    with startup_timing.phase('spawn_default'):
+        pacman.spawn_default()
+    with startup_timing.phase('draw'):
+        pacman.draw()
+    with startup_timing.phase('warm_textures'):
+        pacman.warm_textures()
+
+    if args.telemetry:
+        pacman.defaults['telemetry']['enabled'] = True
+    if args.watch:
+        pacman.defaults['loader']['hot_reload'] = True
+
+    if replay:
+        input_source = replay.to_input()
+    elif args.script:
+        input_source = ScriptedInput.from_file(args.script)
+    else:
+        input_source = KeyboardInput()
+    recording = None
+    if args.record:
+        recording = InputRecording(pacman.seed, pacman.level)
+        input_source = RecordingInput(input_source, recording)
+
+    # run game, errors dump the buffered frame-level events into the log;
+    # recordings are saved even if the game crashed
+    startup_timing.stop()
+    try:
+        pacman.run(input_source)
+    except Exception:
+        logging.exception('Game crashed.')
+        raise
+    finally:
+        if recording:
+            recording.state_hash = pacman.state_hash()
+            recording.save(args.record)
+
+    if args.headless or replay:
+        print(f'{pacman.ticks} ticks, '
+              f'{pacman.ticks_per_second:.1f} ticks per second')
+    if replay:
+        state_hash = pacman.state_hash()
+        if state_hash != replay.state_hash:
+            logging.error('Replay ended in state %s instead of %s.',
+                          state_hash, replay.state_hash)
+            raise SystemExit(f'Replay diverged: final state {state_hash} '
+                             f'instead of {replay.state_hash}.')
+        print(f'Replay matched final state {state_hash}.')
 
 
 if __name__ == '__main__':
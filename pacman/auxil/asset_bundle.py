@@ -0,0 +1,162 @@
+""" Packs the game config and all the textures into a single bundle file
+which is memory-mapped at runtime.
+
+A bundle starts with a header holding its magic, version and the size of
+a JSON index. The index holds defaults.json, paths.json and, for every
+texture folder or sprite sheet named in paths.json, the offset and size
+of its frames. The frames follow as raw pixels already scaled to the game
+unit, so textures are built from slices of the mapped file without
+scanning directories or decoding images. Run from the pacman directory to
+build the bundle:
+
+    python -m auxil.asset_bundle assets.bundle
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from pygame import image, Surface
+from pygame import error as game_error
+
+from auxil import loader
+
+BUNDLE_MAGIC = b'PBDL'
+BUNDLE_VERSION = 1
+# magic, version, index size
+BUNDLE_HEADER = struct.Struct('<4sHI')
+# raw pixel format of the bundled textures
+PIXEL_FORMAT = 'RGB'
+
+
+def get_texture_specs(paths: dict) -> list[str | dict]:
+    """ Returns all the texture folders and sprite sheets named in the paths
+    dict. """
+
+    specs = []
+    for value in paths.values():
+        if isinstance(value, dict) and not loader.is_sheet(value):
+            specs += get_texture_specs(value)
+        else:
+            specs.append(value)
+    return specs
+
+
+def build_bundle(base_dir: str, bundle_path: str) -> None:
+    """ Packs defaults.json, paths.json and every texture they name in
+    'base_dir' into 'bundle_path'. """
+
+    defaults = loader.load_json_dict(os.path.join(base_dir, 'defaults.json'))
+    paths = loader.load_json_dict(os.path.join(base_dir, 'paths.json'))
+    image_size = (defaults['game']['pixels_per_unit'],
+                  defaults['game']['pixels_per_unit'])
+
+    logging.info('Building asset bundle %s...', bundle_path)
+    textures: dict[str, list[tuple[int, int, int]]] = {}
+    pixels = bytearray()
+    sheets: dict[tuple, Surface] = {}
+    for spec in get_texture_specs(paths):
+        key = loader.texture_key(spec)
+        if key in textures:
+            continue
+        frames = []
+        try:
+            for surface in loader.load_frames(
+                    os.path.join(base_dir, 'assets'), spec, image_size,
+                    sheets=sheets):
+                frames.append((len(pixels), *surface.get_size()))
+                pixels += image.tostring(surface, PIXEL_FORMAT)
+        except (OSError, game_error, ValueError, KeyError) as error:
+            logging.error('Error bundling %s textures. Error: %s', key, error)
+            raise SystemExit(f'Error bundling {key} textures.') from error
+        textures[key] = frames
+
+    index = json.dumps({
+        'defaults': defaults,
+        'paths': paths,
+        'textures': textures
+    }, separators=(',', ':')).encode('utf-8')
+    try:
+        with open(bundle_path, 'wb') as bundle_file:
+            bundle_file.write(BUNDLE_HEADER.pack(
+                BUNDLE_MAGIC, BUNDLE_VERSION, len(index)))
+            bundle_file.write(index)
+            bundle_file.write(pixels)
+    except OSError as error:
+        logging.error('Error writing asset bundle %s. Error: %s',
+                      bundle_path, error)
+        raise SystemExit(
+            f'Error writing asset bundle {bundle_path}.') from error
+
+    logging.info('Asset bundle %s built with %s texture folders.',
+                 bundle_path, len(textures))
+
+
+def read_index(buffer: bytes | mmap.mmap) -> tuple[dict, int]:
+    """ Returns the index of the bundle starting in 'buffer' and the
+    offset of its pixels. Raises ValueError for other formats. """
+
+    magic, version, index_size = BUNDLE_HEADER.unpack_from(buffer)
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+        raise ValueError('unknown format')
+    end = BUNDLE_HEADER.size + index_size
+    return json.loads(buffer[BUNDLE_HEADER.size:end]), end
+
+
+def read_defaults(path: str) -> dict:
+    """ Returns the game defaults stored in the bundle 'path' without
+    mapping it or logging, e.g. to set up logging. """
+
+    try:
+        with open(path, 'rb') as bundle_file:
+            header = bundle_file.read(BUNDLE_HEADER.size)
+            index_size = BUNDLE_HEADER.unpack(header)[2]
+            return read_index(header + bundle_file.read(index_size))[0][
+                'defaults']
+    except (OSError, ValueError, struct.error) as error:
+        raise SystemExit(f'Error reading asset bundle {path}.') from error
+
+
+class AssetBundle:
+    """ An asset bundle memory-mapped from its file. Textures are surfaces
+    sharing the pixels of the mapped file. """
+
+    def __init__(self, path: str):
+        self.path = path
+        logging.info('Mapping asset bundle %s...', path)
+        try:
+            with open(path, 'rb') as bundle_file:
+                self.buffer = mmap.mmap(bundle_file.fileno(), 0,
+                                        access=mmap.ACCESS_READ)
+            index, pixels_offset = read_index(self.buffer)
+        except (OSError, ValueError, struct.error) as error:
+            logging.error('Error mapping asset bundle %s. Error: %s',
+                          path, error)
+            raise SystemExit(
+                f'Error mapping asset bundle {path}.') from error
+
+        self.defaults: dict = index['defaults']
+        self.paths: dict = index['paths']
+        self.textures: dict[str, list[list[int]]] = index['textures']
+        self.pixels = memoryview(self.buffer)[pixels_offset:]
+        logging.info('Asset bundle %s mapped.', path)
+
+    def get_frames(self, key: str) -> list[Surface]:
+        """ Returns the frames of the texture folder or sprite sheet with
+        'key', see loader.texture_key, as surfaces backed by the mapped
+        file. """
+
+        frames = []
+        for offset, width, height in self.textures[key]:
+            size = width * height * len(PIXEL_FORMAT)
+            frames.append(image.frombuffer(
+                self.pixels[offset:offset + size], (width, height),
+                PIXEL_FORMAT))
+        return frames
+
+
+if __name__ == '__main__':
+    build_bundle(os.getcwd(), sys.argv[1] if len(sys.argv) > 1
+                 else 'assets.bundle')
@@ -0,0 +1,134 @@
+""" Compiles readable maze descriptions into binary level files.
+
+A maze description is a text file with one line per row of the maze and
+one character per unit:
+
+    '#' outer wall      '-' prison door     '.' coin
+    '=' inner wall      'C' pac spawn       'o' energizer
+    'X' prison wall     '1'-'9' ghost spawn ' ' empty unit
+
+Ghosts are spawned in the order of their digits. Run from the pacman
+directory to compile levels by hand:
+
+    python -m auxil.level_compiler levels/level_0.txt
+"""
+
+import os
+import sys
+import logging
+
+from game.coin_field import NORMAL, ENERGIZER
+from game.level import (LEVEL_MAGIC, LEVEL_VERSION, LEVEL_HEADER, LEVEL_TILE,
+                        WALL_LAYERS)
+from game.passability import PassabilityMap, ALL_BLOCKED, PAC_BLOCKED
+from game.wall_blocks import classify_wall_blocks, BLOCK_TYPE_CODES
+
+WALL_UNITS = {'#': 'outer', '=': 'inner', 'X': 'prison'}
+COIN_UNITS = {'.': NORMAL, 'o': ENERGIZER}
+DOOR_UNIT = '-'
+PAC_UNIT = 'C'
+EMPTY_UNIT = ' '
+
+
+def parse_maze(text: str) -> dict:
+    """ Parses the maze description into wall layers, coins and spawn
+    positions. """
+
+    rows = text.rstrip('\n').split('\n')
+    height = len(rows)
+    width = max(len(row) for row in rows)
+    maze = {
+        'width': width,
+        'height': height,
+        'walls': {layer: [[0] * width for _ in range(height)]
+                  for layer in WALL_LAYERS},
+        'coins': bytearray(width * height),
+        'prison_door': [],
+        'ghost_spawn': {},
+        'pac_spawn': None
+    }
+
+    for row, units in enumerate(rows):
+        for col, unit in enumerate(units.ljust(width)):
+            if unit in WALL_UNITS:
+                maze['walls'][WALL_UNITS[unit]][row][col] = 1
+            elif unit in COIN_UNITS:
+                maze['coins'][row * width + col] = COIN_UNITS[unit]
+            elif unit == DOOR_UNIT:
+                maze['prison_door'].append((row, col))
+            elif unit == PAC_UNIT:
+                maze['pac_spawn'] = (row, col)
+            elif unit.isdigit() and unit != '0':
+                maze['ghost_spawn'][unit] = (row, col)
+            elif unit != EMPTY_UNIT:
+                raise ValueError(f'Unknown unit {unit!r} on ({row}, {col}).')
+
+    if maze['pac_spawn'] is None:
+        raise ValueError('Maze has no pac spawn.')
+    maze['ghost_spawn'] = [maze['ghost_spawn'][digit]
+                           for digit in sorted(maze['ghost_spawn'])]
+    return maze
+
+
+def compile_maze(maze: dict) -> bytes:
+    """ Derives block types and passability of the parsed maze and packs
+    everything into the binary level format. """
+
+    width, height = maze['width'], maze['height']
+    passability = PassabilityMap(width, height, 0)
+    layers = []
+    for layer in WALL_LAYERS:
+        passability.add_layer(maze['walls'][layer], ALL_BLOCKED)
+        layers.append(bytes(
+            BLOCK_TYPE_CODES[block_type]
+            for row in classify_wall_blocks(maze['walls'][layer])
+            for block_type in row))
+    passability.add_tiles(maze['prison_door'], PAC_BLOCKED)
+
+    return b''.join([
+        LEVEL_HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, width, height,
+                          *maze['pac_spawn'], len(maze['ghost_spawn']),
+                          len(maze['prison_door'])),
+        *(LEVEL_TILE.pack(*tile) for tile in maze['ghost_spawn']),
+        *(LEVEL_TILE.pack(*tile) for tile in maze['prison_door']),
+        *layers,
+        bytes(passability.tiles),
+        bytes(maze['coins'])
+    ])
+
+
+def compile_level(source_path: str, level_path: str) -> None:
+    """ Compiles the maze description in 'source_path' into 'level_path'. """
+
+    logging.info('Compiling level %s...', source_path)
+    try:
+        with open(source_path, 'r', encoding='utf-8') as source_file:
+            level = compile_maze(parse_maze(source_file.read()))
+        with open(level_path, 'wb') as level_file:
+            level_file.write(level)
+    except IOError as error:
+        logging.error('Error compiling level %s. Error: %s',
+                      source_path, error)
+        raise SystemExit(f'Error compiling level {source_path}.') from error
+    except ValueError as error:
+        logging.error('Error parsing level %s. Error: %s', source_path, error)
+        raise SystemExit(f'Error parsing level {source_path}.') from error
+
+    logging.info('Level compiled into %s.', level_path)
+
+
+def get_compiled_level(source_path: str) -> str:
+    """ Returns the path of the compiled level of 'source_path'. The level is
+    compiled first if it does not exist or is older than its source. """
+
+    level_path = os.path.splitext(source_path)[0] + '.lvl'
+    if not os.path.exists(level_path) or\
+            os.path.getmtime(level_path) < os.path.getmtime(source_path):
+        compile_level(source_path, level_path)
+
+    return level_path
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        compile_level(path, os.path.splitext(path)[0] + '.lvl')
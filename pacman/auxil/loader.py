@@ -1,11 +1,19 @@
 """ Contains functions for loading game assets. """
 
+from __future__ import annotations
+
 import os
 import json
 import logging
-from pygame import image, transform, Surface
+from typing import TYPE_CHECKING
+from pygame import image, transform, Rect, Surface
 from pygame import error as game_error
 
+from auxil.texture_cache import TextureCache
+
+if TYPE_CHECKING:
+    from auxil.asset_bundle import AssetBundle
+
 
 def load_json_dict(path: str) -> dict:
     """ Reads the JSON-formatted dict stored in 'path'. """
@@ -28,43 +36,150 @@ def load_json_dict(path: str) -> dict:
     return json_dict
 
 
+def decode_texture(file_path: str, image_size: tuple[int, int],
+                   cache: TextureCache = None) -> Surface:
+    """ Loads the image stored in 'file_path' and scales it to 'image_size'.
+    The scaled image is taken from 'cache' if given and still up to date. """
+
+    surface = cache.get(file_path, image_size) if cache else None
+    if surface is None:
+        logging.debug('Loading %s as texture...', file_path)
+        surface = image.load(file_path)
+        surface = transform.scale(surface, image_size)
+        if cache:
+            cache.put(file_path, image_size, surface)
+
+    return surface
+
+
+def is_sheet(spec: str | dict) -> bool:
+    """ Tests if the texture spec in paths.json is a sprite sheet rather than
+    a folder with a file per frame. """
+
+    return isinstance(spec, dict) and 'sheet' in spec
+
+
+def texture_key(spec: str | dict) -> str:
+    """ Returns a string identifying the texture spec in paths.json. """
+
+    if is_sheet(spec):
+        return json.dumps(spec, sort_keys=True, separators=(',', ':'))
+    return spec
+
+
+def load_sheet(assets_dir: str, spec: dict, image_size: tuple[int, int],
+               cache: TextureCache = None,
+               sheets: dict[tuple, Surface] = None) -> Surface:
+    """ Loads the sprite sheet of 'spec' scaled so that the cells of its
+    grid have 'image_size'. Sheets already in 'sheets' are reused. """
+
+    columns, rows = spec['grid']
+    key = (spec['sheet'], columns, rows, tuple(image_size))
+    if sheets is not None and key in sheets:
+        return sheets[key]
+
+    sheet = decode_texture(
+        os.path.join(assets_dir, *spec['sheet'].split('/')),
+        (columns * image_size[0], rows * image_size[1]), cache)
+    if sheets is not None:
+        sheets[key] = sheet
+    return sheet
+
+
+def load_frames(assets_dir: str, spec: str | dict,
+                image_size: tuple[int, int], cache: TextureCache = None,
+                sheets: dict[tuple, Surface] = None) -> list[Surface]:
+    """ Loads the animation frames of a texture spec in paths.json: either
+    a folder with a file per frame or a sprite sheet given by its file, its
+    'grid' of [columns, rows] and the 'row', first 'col' and 'count' of the
+    frames in the grid. Sheet frames are subsurfaces sharing the pixels of
+    the sheet. """
+
+    if is_sheet(spec):
+        sheet = load_sheet(assets_dir, spec, image_size, cache, sheets)
+        row, col = spec.get('row', 0), spec.get('col', 0)
+        return [sheet.subsurface(Rect((col + frame) * image_size[0],
+                                      row * image_size[1], *image_size))
+                for frame in range(spec['count'])]
+
+    folder_path = os.path.join(assets_dir, *spec.split('/'))
+    logging.debug('Scanning folder %s...', folder_path)
+    # files are ordered by name
+    return [decode_texture(os.path.join(folder_path, file), image_size,
+                           cache)
+            for file in sorted(os.listdir(folder_path))]
+
+
+def convert_textures(object_textures: dict[str, list[Surface]])\
+        -> dict[str, list[Surface]]:
+    """ Converts decoded textures to the display pixel format. Must be
+    called from the main thread. Frames of a sprite sheet stay subsurfaces
+    of the sheet, which is converted once. """
+
+    logging.debug('Converting surfaces...')
+    sheets: dict[int, Surface] = {}
+
+    def convert(surface: Surface) -> Surface:
+        parent = surface.get_parent()
+        if parent is None:
+            return surface.convert()
+        if id(parent) not in sheets:
+            sheets[id(parent)] = parent.convert()
+        return sheets[id(parent)].subsurface(
+            Rect(surface.get_offset(), surface.get_size()))
+
+    return {folder: [convert(surface) for surface in animation_list]
+            for folder, animation_list in object_textures.items()}
+
+
 def load_textures(assets_dir: str, assets_paths: dict, key: str,
-                  image_size: tuple[int, int])\
+                  image_size: tuple[int, int],
+                  cache: TextureCache = None, convert: bool = True,
+                  sheets: dict[tuple, Surface] = None)\
         -> dict[str, list[Surface]]:
-    """ Loads object textures given its key in assets/paths.json. """
+    """ Loads object textures given its key in assets/paths.json. Scaled
+    textures are taken from 'cache' if given and still up to date, scaled
+    sprite sheets from 'sheets'. With 'convert' unset, the textures are only
+    decoded and scaled so that this function can run outside the main
+    thread. """
 
     object_textures = {}
 
     logging.info('Loading object %s textures...', key)
 
-    for folder, folder_path in assets_paths[key].items():
+    for folder, spec in assets_paths[key].items():
         logging.debug('Loading %s textures...', folder)
-        folder_path = os.path.join(assets_dir, *folder_path.split('/'))
-        animation_list = []
         try:
-            logging.debug('Scanning folder %s...', folder_path)
-            # get folder files
-            files = os.listdir(folder_path)
-
-            # order them by name
-            files = sorted(files)
-
-            # load images
-            for file in files:
-                file_path = os.path.join(folder_path, file)
-                logging.debug('Loading %s as texture...', file_path)
-                surface = image.load(file_path)
-                surface = transform.scale(surface, image_size)
-                logging.debug('Converting surface...')
-                frame = surface.convert()
-                animation_list.append(frame)
-        except game_error as error:
+            object_textures[folder] = load_frames(assets_dir, spec,
+                                                  image_size, cache, sheets)
+        except (game_error, ValueError, KeyError) as error:
             logging.error('Error loading %s textures. Error: %s', key, error)
             raise SystemExit(f'Error loading {key} textures.') from error
 
         logging.debug('Done loading %s textures.', folder)
-        object_textures[folder] = animation_list.copy()
-        animation_list = []
+
+    if convert:
+        object_textures = convert_textures(object_textures)
+
+    logging.info('Object %s textures loaded.', key)
+    return object_textures
+
+
+def load_bundle_textures(bundle: AssetBundle, assets_paths: dict, key: str,
+                         convert: bool = True) -> dict[str, list[Surface]]:
+    """ Loads object textures given its key in the paths of an asset
+    bundle. The textures are already scaled in the bundle. """
+
+    logging.info('Loading object %s textures from bundle...', key)
+    try:
+        object_textures = {folder: bundle.get_frames(texture_key(spec))
+                           for folder, spec in assets_paths[key].items()}
+    except (KeyError, ValueError) as error:
+        logging.error('Error loading %s textures. Error: %s', key, error)
+        raise SystemExit(f'Error loading {key} textures.') from error
+
+    if convert:
+        object_textures = convert_textures(object_textures)
 
     logging.info('Object %s textures loaded.', key)
     return object_textures
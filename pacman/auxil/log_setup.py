@@ -0,0 +1,91 @@
+""" Contains the logging setup of the game. """
+
+import atexit
+import logging
+import logging.handlers
+import queue
+from collections import deque
+
+# logger of the events logged every frame
+FRAME_LOGGER = 'pacman.frame'
+
+
+class FrameBufferHandler(logging.Handler):
+    """ Keeps the last frame-level records in a ring buffer. The buffer is
+    passed to 'target' when an error is logged or on demand. Every
+    'sample_rate'-th frame record is passed right away. """
+
+    def __init__(self, capacity: int, target: logging.Handler,
+                 sample_rate: int = 0):
+        super().__init__()
+        self.buffer: deque[logging.LogRecord] = deque(maxlen=capacity)
+        self.target = target
+        self.sample_rate = sample_rate
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.name.startswith(FRAME_LOGGER):
+            self.count += 1
+            if self.sample_rate and not self.count % self.sample_rate:
+                self.target.handle(record)
+            else:
+                self.buffer.append(record)
+        elif record.levelno >= logging.ERROR:
+            self.dump()
+
+    def dump(self) -> None:
+        """ Passes all the buffered records to the target handler. """
+
+        records = list(self.buffer)
+        self.buffer.clear()
+        for record in records:
+            self.target.handle(record)
+
+
+class NoFrameFilter(logging.Filter):
+    """ Rejects frame-level records. """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.name.startswith(FRAME_LOGGER)
+
+
+def init_logging(path: str, background: bool = True,
+                 frame_buffer: int = 0, frame_sample: int = 0)\
+        -> FrameBufferHandler | None:
+    """ Logs into the file 'path'. With 'background' set, records are
+    written by a background thread and frame-level records are kept in a
+    ring buffer of 'frame_buffer' records, which is returned. Otherwise
+    every record is written synchronously. """
+
+    if not background:
+        logging.basicConfig(filename=path, filemode='w+',
+                            encoding='utf-8', level=logging.DEBUG)
+        return None
+
+    file_handler = logging.FileHandler(path, mode='w+', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    record_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(record_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # frame-level records only reach the queue through the ring buffer
+    queue_handler = logging.handlers.QueueHandler(record_queue)
+    queue_handler.addFilter(NoFrameFilter())
+    frame_handler = FrameBufferHandler(
+        frame_buffer, logging.handlers.QueueHandler(record_queue),
+        frame_sample)
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    # buffered records are dumped before the error which triggered it
+    root.addHandler(frame_handler)
+    root.addHandler(queue_handler)
+    return frame_handler
+
+
+def dump_frame_log() -> None:
+    """ Writes the buffered frame-level records into the log. """
+
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, FrameBufferHandler):
+            handler.dump()
@@ -0,0 +1,109 @@
+""" Contains the timing of the startup phases of the game.
+
+Phases are timed whenever they run until 'stop' is called; the cost is a
+couple of clock reads per phase. The report is only written when asked
+for with the --startup-timing flag of app.py or the PACMAN_STARTUP_TIMING
+environment variable, set to a file path or to '-' for standard output.
+"""
+
+import atexit
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+ENV_VAR = 'PACMAN_STARTUP_TIMING'
+
+
+class Phase:
+    """ A timed phase with its nested phases. """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.duration = 0.0
+        self.children: list['Phase'] = []
+
+
+_root = Phase('startup')
+# phases of other threads overlap the main thread and are kept apart
+_background = Phase('background threads')
+_root_start = time.perf_counter()
+_local = threading.local()
+_recording = True
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """ Times the code run inside as phase 'name', nested in the phase
+    running in the same thread. """
+
+    if not _recording:
+        yield
+        return
+
+    if not hasattr(_local, 'stack'):
+        _local.stack = [_root if threading.current_thread() is
+                        threading.main_thread() else _background]
+    stack = _local.stack
+    current = Phase(name)
+    stack[-1].children.append(current)
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.duration = time.perf_counter() - start
+        stack.pop()
+
+
+def stop() -> None:
+    """ Stops timing phases, e.g. once the game loop starts. """
+
+    global _recording
+    if _recording:
+        _recording = False
+        _root.duration = time.perf_counter() - _root_start
+
+
+def format_report() -> str:
+    """ Returns the phase tree with the costliest phases first. """
+
+    lines = [f'{"ms":>10} {"%":>6}  phase']
+
+    def add_phase(current: Phase, depth: int) -> None:
+        share = current.duration / _root.duration * 100\
+            if _root.duration else 0.0
+        lines.append(f'{current.duration * 1e3:>10.2f} {share:>6.1f}  '
+                     f'{"  " * depth}{current.name}')
+        for child in sorted(current.children, key=lambda child:
+                            child.duration, reverse=True):
+            add_phase(child, depth + 1)
+
+    add_phase(_root, 0)
+    untimed = _root.duration - sum(child.duration
+                                   for child in _root.children)
+    lines.append(f'{untimed * 1e3:>10.2f} {"":>6}  (not in any phase)')
+    if _background.children:
+        _background.duration = sum(child.duration
+                                   for child in _background.children)
+        add_phase(_background, 0)
+    return '\n'.join(lines) + '\n'
+
+
+def write_report(path: str) -> None:
+    """ Writes the report into 'path', or standard output for '-'. """
+
+    stop()
+    if path == '-':
+        sys.stdout.write(format_report())
+        return
+
+    with open(path, 'w', encoding='utf-8') as report_file:
+        report_file.write(format_report())
+
+
+def report_at_exit(path: str) -> None:
+    """ Writes the report into 'path' when the game exits. """
+
+    atexit.register(write_report, path)
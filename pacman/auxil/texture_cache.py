@@ -0,0 +1,95 @@
+""" Contains the on-disk cache of scaled texture pixel data. """
+
+import os
+import logging
+import pickle
+import threading
+from pygame import image, Surface
+
+# raw pixel format of the cached textures
+PIXEL_FORMAT = 'RGB'
+
+
+class TextureCache:
+    """ Stores already scaled texture pixels keyed by source file, its
+    modification time and the texture size. """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[str, tuple[int, tuple[int, int], bytes]] = {}
+        self.dirty = False
+        # textures may be decoded outside the main thread
+        self.lock = threading.Lock()
+
+    def load(self) -> None:
+        """ Reads the cache file. A missing or broken cache file only
+        results in an empty cache. """
+
+        logging.info('Reading texture cache %s...', self.path)
+        try:
+            with open(self.path, 'rb') as cache_file:
+                self.entries = pickle.load(cache_file)
+        except FileNotFoundError:
+            logging.info('Texture cache %s not found.', self.path)
+            self.entries = {}
+        except (OSError, pickle.UnpicklingError, EOFError,
+                ValueError, TypeError) as error:
+            logging.warning('Error reading texture cache %s. Error: %s',
+                            self.path, error)
+            self.entries = {}
+
+        logging.info('Texture cache contains %s entries.', len(self.entries))
+
+    def save(self) -> None:
+        """ Writes the cache file, dropping entries whose source files no
+        longer exist. """
+
+        with self.lock:
+            stale = [file_path for file_path in self.entries
+                     if not os.path.exists(file_path)]
+            for file_path in stale:
+                del self.entries[file_path]
+            if not (self.dirty or stale):
+                return
+
+            logging.info('Writing texture cache %s...', self.path)
+            tmp_path = self.path + '.tmp'
+            try:
+                with open(tmp_path, 'wb') as cache_file:
+                    pickle.dump(self.entries, cache_file,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+            except OSError as error:
+                logging.warning('Error writing texture cache %s. Error: %s',
+                                self.path, error)
+                return
+
+            self.dirty = False
+        logging.info('Texture cache written.')
+
+    def get(self, file_path: str, image_size: tuple[int, int])\
+            -> Surface | None:
+        """ Returns the cached scaled surface of 'file_path' or None if the
+        entry is missing or stale. """
+
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return None
+
+        mtime, size, pixels = entry
+        if mtime != os.stat(file_path).st_mtime_ns or\
+                size != tuple(image_size):
+            logging.debug('Texture cache entry %s is stale.', file_path)
+            return None
+
+        return image.fromstring(pixels, size, PIXEL_FORMAT)
+
+    def put(self, file_path: str, image_size: tuple[int, int],
+            surface: Surface) -> None:
+        """ Stores the scaled 'surface' loaded from 'file_path'. """
+
+        entry = (os.stat(file_path).st_mtime_ns, tuple(image_size),
+                 image.tostring(surface, PIXEL_FORMAT))
+        with self.lock:
+            self.entries[file_path] = entry
+            self.dirty = True
@@ -0,0 +1,82 @@
+""" Benchmarks the solid collision test of moving objects against mazes of
+growing size. Run from the pacman directory:
+
+    python -m benchmarks.collision
+"""
+
+import random
+import timeit
+from pygame import Rect, Surface
+from pygame.sprite import RenderUpdates, spritecollideany
+
+from game.game_object import GameObject
+from game.passability import PassabilityMap, PAC_BLOCKED
+
+PIXELS_PER_UNIT = 24
+MAZE_SIZES = [28, 56, 112, 224]
+CHECKS = 2000
+
+
+def make_maze(size: int, rnd: random.Random) -> list[list[int]]:
+    """ Returns a synthetic square maze with a border wall and random inner
+    blocks. """
+
+    return [[1 if row in (0, size - 1) or col in (0, size - 1) or
+             rnd.random() < 0.35 else 0 for col in range(size)]
+            for row in range(size)]
+
+
+def make_wall_group(maze: list[list[int]]) -> RenderUpdates:
+    """ Returns one wall sprite per wall tile like the Spawner does. """
+
+    texture = [Surface((PIXELS_PER_UNIT, PIXELS_PER_UNIT))]
+    walls = RenderUpdates()
+    for row, units in enumerate(maze):
+        for col, unit in enumerate(units):
+            if unit:
+                walls.add(GameObject(
+                    texture, Rect(col * PIXELS_PER_UNIT,
+                                  row * PIXELS_PER_UNIT,
+                                  PIXELS_PER_UNIT, PIXELS_PER_UNIT),
+                    'wall', False))
+    return walls
+
+
+def main():
+    """ Times both collision tests for every maze size. """
+
+    rnd = random.Random(0)
+    print(f'{"maze":>9} {"walls":>7} {"sprites us":>11} {"bitmap us":>10}')
+    for size in MAZE_SIZES:
+        maze = make_maze(size, rnd)
+        walls = make_wall_group(maze)
+        passability = PassabilityMap(size, size, PIXELS_PER_UNIT)
+        passability.add_layer(maze, PAC_BLOCKED)
+
+        # moving objects are never further than a unit from a free tile
+        objects = [GameObject([Surface((1, 1))],
+                              Rect(rnd.randrange(size * PIXELS_PER_UNIT),
+                                   rnd.randrange(size * PIXELS_PER_UNIT),
+                                   PIXELS_PER_UNIT, PIXELS_PER_UNIT),
+                              'pac', True)
+                   for _ in range(CHECKS)]
+
+        sprite_time = timeit.timeit(
+            lambda: [spritecollideany(obj, walls) for obj in objects],
+            number=3) / 3 / CHECKS
+        bitmap_time = timeit.timeit(
+            lambda: [passability.is_blocked(obj.rect, PAC_BLOCKED)
+                     for obj in objects],
+            number=3) / 3 / CHECKS
+
+        # both tests must agree
+        assert all(bool(spritecollideany(obj, walls)) ==
+                   passability.is_blocked(obj.rect, PAC_BLOCKED)
+                   for obj in objects)
+
+        print(f'{size:>4}x{size:<4} {len(walls):>7} '
+              f'{sprite_time * 1e6:>11.2f} {bitmap_time * 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+""" Benchmarks ghost movement decisions per tile against decisions at the
+junctions of the junction graph, with ghosts walking randomly through the
+default level and synthetic mazes of growing size. Run from the pacman
+directory:
+
+    python -m benchmarks.junction_graph
+"""
+
+import logging
+import os
+import random
+import time
+
+from auxil import loader, level_compiler
+from benchmarks.suite import MAZE_SCALES
+from game.distance_field import STEPS
+from game.junction_graph import JunctionGraph
+from game.level import Level
+from game.passability import PassabilityMap, GHOST_BLOCKED, ALL_BLOCKED
+
+GHOSTS = 4
+TICKS = 20000
+# synthetic mazes have straight corridors between blocks of this size
+BLOCK_SIZE = 7
+
+
+def make_maze(width: int, height: int) -> PassabilityMap:
+    """ Returns a synthetic maze of single unit corridors around square
+    wall blocks. """
+
+    passability = PassabilityMap(width, height, 0)
+    passability.add_layer(
+        [[1 if row % (BLOCK_SIZE + 1) and col % (BLOCK_SIZE + 1) or
+          row in (0, height - 1) or col in (0, width - 1) else 0
+          for col in range(width)] for row in range(height)], ALL_BLOCKED)
+    return passability
+
+
+def walk_tiles(passability: PassabilityMap, starts: list[int],
+               rnd: random.Random) -> int:
+    """ Walks the ghosts tile by tile, deciding on every tile among the open
+    neighbours other than the way back. Returns the number of decisions. """
+
+    width, height = passability.width_units, passability.height_units
+    tiles = passability.tiles
+    positions = list(starts)
+    codes = [0] * len(starts)
+    decisions = 0
+    for _ in range(TICKS):
+        for ghost, tile in enumerate(positions):
+            row, col = divmod(tile, width)
+            options = []
+            for code, (row_step, col_step) in enumerate(STEPS, 1):
+                if 0 <= row + row_step < height and\
+                        0 <= col + col_step < width and\
+                        not tiles[tile + row_step * width + col_step] &\
+                        GHOST_BLOCKED and\
+                        code != (codes[ghost] + 1) % 4 + 1:
+                    options.append(code)
+            decisions += 1
+            if not options:
+                options = [(codes[ghost] + 1) % 4 + 1]
+            codes[ghost] = rnd.choice(options)
+            row_step, col_step = STEPS[codes[ghost] - 1]
+            positions[ghost] = tile + row_step * width + col_step
+    return decisions
+
+
+def walk_junctions(graph: JunctionGraph, starts: list[int],
+                   rnd: random.Random) -> int:
+    """ Walks the ghosts along the corridors of the graph, deciding only on
+    junctions among the corridors other than the way back. Returns the
+    number of decisions. """
+
+    corridors = [graph.exits[graph.junction_index[start]][0]
+                 for start in starts]
+    positions = [0] * len(starts)
+    decisions = 0
+    for _ in range(TICKS):
+        for ghost, corridor in enumerate(corridors):
+            positions[ghost] += 1
+            if positions[ghost] < graph.corridors[corridor].length:
+                continue
+            arrived = graph.corridors[corridor]
+            back = (arrived.steps[-1] + 1) % 4 + 1
+            exits = graph.exits[graph.junction_index[arrived.end]]
+            options = [exit for exit in exits
+                       if graph.corridors[exit].steps[0] != back] or exits
+            decisions += 1
+            corridors[ghost] = rnd.choice(options)
+            positions[ghost] = 0
+    return decisions
+
+
+def measure(name: str, passability: PassabilityMap) -> None:
+    """ Builds the graph of the maze and prints the decisions and time per
+    ghost tick of both walks. """
+
+    start = time.perf_counter()
+    graph = JunctionGraph(passability, GHOST_BLOCKED)
+    build_time = time.perf_counter() - start
+    # ghosts start on junctions with a way out
+    starts = random.Random(0).sample(
+        [tile for junction, tile in enumerate(graph.junctions)
+         if graph.exits[junction]], GHOSTS)
+
+    results = []
+    for walk, maze in ((walk_tiles, passability), (walk_junctions, graph)):
+        start = time.perf_counter()
+        decisions = walk(maze, starts, random.Random(0))
+        results.append((decisions / (GHOSTS * TICKS),
+                        (time.perf_counter() - start) / (GHOSTS * TICKS)))
+
+    print(f'{name:>9} {len(graph.junctions):>9} {build_time * 1e3:>9.2f} '
+          f'{results[0][0]:>10.3f} {results[1][0]:>10.3f} '
+          f'{results[0][1] * 1e6:>9.3f} {results[1][1] * 1e6:>9.3f}')
+
+
+def main():
+    """ Measures the default level and every synthetic maze size. """
+
+    logging.disable()
+    defaults = loader.load_json_dict(os.path.join(os.getcwd(),
+                                                  'defaults.json'))
+    level = Level(level_compiler.get_compiled_level(os.path.join(
+        os.getcwd(), *defaults['levels'][0].split('/'))))
+    print(f'{"maze":>9} {"junctions":>9} {"build ms":>9} '
+          f'{"tile dec":>10} {"junc dec":>10} {"tile us":>9} '
+          f'{"junc us":>9}')
+    measure('default', PassabilityMap.from_level(level, 0))
+    for scale in MAZE_SCALES:
+        width = defaults['game']['width_units'] * scale
+        height = defaults['game']['height_units'] * scale
+        measure(f'{width}x{height}', make_maze(width, height))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+""" Checks that the compiled levels spawn the maze described by their text
+maps: walls, door, coins and spawn positions are read straight from the
+text and compared with what PassabilityMap.from_level,
+CoinField.from_level and the level itself give. Run from the pacman
+directory, for all the levels in defaults.json by default:
+
+    python -m benchmarks.level_check [levels/level_0.txt ...]
+"""
+
+import logging
+import os
+import sys
+
+from auxil import loader, level_compiler
+from game.coin_field import CoinField, EMPTY, NORMAL, ENERGIZER
+from game.level import Level
+from game.passability import PassabilityMap, ALL_BLOCKED, PAC_BLOCKED
+
+WALL_LAYERS = {'#': 'outer', '=': 'inner', 'X': 'prison'}
+COINS = {'.': NORMAL, 'o': ENERGIZER}
+
+
+def check_level(source_path: str) -> list[str]:
+    """ Returns the differences between the text map in 'source_path' and
+    its compiled level. """
+
+    with open(source_path, 'r', encoding='utf-8') as source_file:
+        rows = source_file.read().rstrip('\n').split('\n')
+    width = max(len(row) for row in rows)
+    rows = [row.ljust(width) for row in rows]
+    level = Level(level_compiler.get_compiled_level(source_path))
+
+    problems = []
+    if (level.width_units, level.height_units) != (width, len(rows)):
+        return [f'size {level.width_units}x{level.height_units} instead of '
+                f'{width}x{len(rows)}']
+
+    tiles = bytes(ALL_BLOCKED if unit in WALL_LAYERS else
+                  PAC_BLOCKED if unit == '-' else 0
+                  for row in rows for unit in row)
+    if PassabilityMap.from_level(level, 1).tiles != tiles:
+        problems.append('passability differs')
+
+    cells = bytes(COINS.get(unit, EMPTY) for row in rows for unit in row)
+    coin_field = CoinField.from_level(level, 1)
+    if bytes(coin_field.cells) != cells or\
+            coin_field.remaining != len(cells) - cells.count(EMPTY):
+        problems.append('coins differ')
+
+    for unit, layer in WALL_LAYERS.items():
+        walls = {(row, col) for row, units in enumerate(rows)
+                 for col, text_unit in enumerate(units) if text_unit == unit}
+        if {(row, col) for row, col, _ in level.wall_blocks(layer)} != walls:
+            problems.append(f'{layer} wall differs')
+
+    def find(units: str) -> list[tuple[int, int]]:
+        return [(row, col) for row, text_units in enumerate(rows)
+                for col, unit in enumerate(text_units) if unit in units]
+
+    if [tuple(tile) for tile in level.prison_door] != find('-'):
+        problems.append('prison door differs')
+    if [tuple(level.pac_spawn)] != find('C'):
+        problems.append('pac spawn differs')
+    ghosts = sorted((rows[row][col], (row, col))
+                    for row, col in find('123456789'))
+    if [tuple(tile) for tile in level.ghost_spawn] !=\
+            [tile for _, tile in ghosts]:
+        problems.append('ghost spawns differ')
+    return problems
+
+
+def main():
+    """ Checks every level given or listed in defaults.json. """
+
+    logging.disable()
+    paths = sys.argv[1:] or [
+        os.path.join(*path.split('/')) for path in loader.load_json_dict(
+            os.path.join(os.getcwd(), 'defaults.json'))['levels']]
+    failed = False
+    for path in paths:
+        problems = check_level(path)
+        print(f'{path}: {", ".join(problems) or "ok"}')
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit('Compiled levels differ from their text maps.')
+
+
+if __name__ == '__main__':
+    main()
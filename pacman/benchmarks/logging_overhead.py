@@ -0,0 +1,66 @@
+""" Benchmarks the per-frame cost of logging in the game loop. Every
+logging mode runs in its own process. Run from the pacman directory:
+
+    python -m benchmarks.logging_overhead
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+FRAMES = 3000
+MODES = ['off', 'sync', 'background']
+
+
+def run_frames(mode: str) -> float:
+    """ Runs the game headless for FRAMES frames with pac walking around
+    and returns the mean frame time in seconds. """
+
+    # pylint: disable=import-outside-toplevel
+    import logging
+    from auxil import log_setup
+    from game.game_state import GameState
+    from game.input_source import ScriptedInput, KEY_NAMES
+    from game.pacman import Pacman
+
+    log_path = os.path.join(tempfile.mkdtemp(), 'log')
+    if mode == 'off':
+        logging.disable()
+    else:
+        log_setup.init_logging(log_path, mode == 'background', 2000)
+
+    pacman = Pacman(GameState.RUNNING, os.getcwd(), headless=True)
+    pacman.init_gfx()
+    pacman.load_textures()
+    pacman.spawn_default()
+    pacman.draw()
+
+    arrows = [KEY_NAMES[name] for name in ('up', 'right', 'down', 'left')]
+    pacman.run(ScriptedInput([(20, frozenset([arrows[step % 4]]))
+                              for step in range(FRAMES // 20)]))
+    return 1 / pacman.ticks_per_second
+
+
+def main():
+    """ Runs every logging mode in a subprocess and prints the frame
+    times. """
+
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.logging_overhead', mode],
+            check=True, capture_output=True, text=True).stdout
+        results[mode] = float(output.split()[-1])
+
+    print(f'{"mode":>10} {"frame us":>9} {"logging us":>11}')
+    for mode, frame_time in results.items():
+        print(f'{mode:>10} {frame_time * 1e6:>9.1f} '
+              f'{(frame_time - results["off"]) * 1e6:>11.1f}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print(run_frames(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,113 @@
+""" Benchmarks a multiplayer game over the local loopback: a game server in
+its own process and headless clients playing pac and the ghosts with
+random keys. Reports the bytes received per tick against the full state
+and the latency from sending a key change to receiving the first tick
+which applied it. The last client joins late; at the end every client
+must hold the same entities and coins as the server. Run from the pacman
+directory:
+
+    python -m benchmarks.multiplayer
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+from multiprocessing.connection import Connection
+
+from game.input_recording import RECORDED_KEYS
+from game.input_source import ScriptedInput, KEY_NAMES
+from game.multiplayer import GameClient, GameServer
+from game.pacman import Pacman
+
+CLIENTS = 5
+TICK_RATE = 60
+TICKS = 600
+# ticks between key changes of the clients
+KEY_STEP = 8
+# ticks played before the last client joins
+LATE_JOIN = 200
+
+
+def _serve(connection: Connection, base_dir: str) -> None:
+    """ Runs the server for TICKS ticks, sending the bound port through
+    'connection' once serving and the final state when done. """
+
+    logging.disable()
+    server = GameServer(base_dir, seed=0, tick_rate=TICK_RATE)
+    asyncio.run(server.serve('127.0.0.1', 0, TICKS, connection.send))
+    connection.send(get_state(server.pacman))
+
+
+def get_state(pacman: Pacman) -> tuple[list[int], list[int], bytes]:
+    """ Returns the entity positions and coin cells of the game. """
+
+    return (list(pacman.entities.x), list(pacman.entities.y),
+            bytes(pacman.coins.cells))
+
+
+def make_input(rnd: random.Random) -> ScriptedInput:
+    """ Returns random keys changing every KEY_STEP ticks for longer than
+    the server runs. """
+
+    return ScriptedInput([
+        (KEY_STEP, frozenset([KEY_NAMES[rnd.choice(RECORDED_KEYS)]]))
+        for _ in range(TICKS // KEY_STEP + 1)])
+
+
+async def play(base_dir: str, port: int) -> list[GameClient]:
+    """ Plays on the server with all the clients until it stops. """
+
+    async def join_late(client: GameClient) -> None:
+        await asyncio.sleep(LATE_JOIN / TICK_RATE)
+        await client.run('127.0.0.1', port)
+
+    rnd = random.Random(0)
+    clients = [GameClient(base_dir, make_input(rnd), headless=True)
+               for _ in range(CLIENTS)]
+    await asyncio.gather(*(client.run('127.0.0.1', port)
+                           for client in clients[:-1]),
+                         join_late(clients[-1]))
+    return clients
+
+
+def main():
+    """ Runs the server and the clients and prints the results of every
+    client. """
+
+    logging.disable()
+    base_dir = os.getcwd()
+    connection, server_connection = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, daemon=True,
+                                     args=(server_connection, base_dir))
+    server.start()
+    port = connection.recv()
+    clients = asyncio.run(play(base_dir, port))
+    server_state = connection.recv()
+    server.join()
+
+    print(f'{CLIENTS} clients, {TICK_RATE} ticks per second')
+    print(f'{"entity":>22} {"ticks":>6} {"B/tick":>7} {"full B":>7} '
+          f'{"inputs":>7} {"mean ms":>8} {"p95 ms":>7}')
+    for client in clients:
+        latencies = sorted(client.latencies) or [0.0]
+        delta_bytes = (client.bytes_received - client.welcome_size) /\
+            max(client.deltas, 1)
+        print(f'{client.pacman.entities.types[client.entity]:>22} '
+              f'{client.deltas:>6} {delta_bytes:>7.1f} '
+              f'{client.welcome_size:>7} {len(client.latencies):>7} '
+              f'{sum(latencies) / len(latencies) * 1e3:>8.2f} '
+              f'{latencies[len(latencies) * 95 // 100] * 1e3:>7.2f}')
+
+    differing = [client.pacman.entities.types[client.entity]
+                 for client in clients
+                 if get_state(client.pacman) != server_state]
+    if differing:
+        raise SystemExit(f'State of {", ".join(differing)} differs from the '
+                         'server.')
+    print('All clients match the server.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+""" Benchmarks the startup phases and the frame cost of the game, headless,
+on the default level and on synthetic mazes of growing size. Results are
+stored as JSON and compared with a previous run if given. Run from the
+pacman directory:
+
+    python -m benchmarks.suite -o before.json
+    python -m benchmarks.suite -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from auxil import loader
+
+# synthetic mazes are the default maze size times these scales
+MAZE_SCALES = [2, 4]
+REPEATS = 5
+FRAMES = 1000
+# best times slower than this ratio to the compared run are regressions
+REGRESSION_RATIO = 1.25
+
+
+def make_maze(width: int, height: int) -> str:
+    """ Returns the description of a synthetic maze with an outer wall,
+    inner wall blocks separated by coin corridors, a prison and pac. """
+
+    rows = [[' '] * width for _ in range(height)]
+    for row in range(height):
+        for col in range(width):
+            if row in (0, height - 1) or col in (0, width - 1):
+                rows[row][col] = '#'
+            elif row % 4 in (2, 3) and col % 5 in (2, 3, 4):
+                rows[row][col] = '='
+            else:
+                rows[row][col] = '.'
+
+    # prison with the ghosts next to the top left corner
+    for col in range(1, 9):
+        rows[1][col] = ' '
+        rows[2][col] = rows[4][col] = 'X'
+        rows[3][col] = ' '
+    rows[3][1] = rows[3][8] = 'X'
+    rows[2][4] = rows[2][5] = '-'
+    for index, col in enumerate(range(3, 7), 1):
+        rows[3][col] = str(index)
+    rows[1][1] = 'C'
+    return ''.join(''.join(row) + '\n' for row in rows)
+
+
+def make_base_dir(width: int, height: int, base_dir: str) -> str:
+    """ Returns a temporary game directory sharing the assets and paths of
+    'base_dir' with a single synthetic level of the given size. """
+
+    maze_dir = tempfile.mkdtemp(prefix='pacman_bench_')
+    defaults = loader.load_json_dict(os.path.join(base_dir, 'defaults.json'))
+    defaults['game']['width_units'] = width
+    defaults['game']['height_units'] = height
+    defaults['window']['width'] = width * defaults['game']['pixels_per_unit']
+    defaults['window']['height'] =\
+        height * defaults['game']['pixels_per_unit']
+    defaults['levels'] = ['levels/bench.txt']
+    with open(os.path.join(maze_dir, 'defaults.json'), 'w',
+              encoding='utf-8') as defaults_file:
+        json.dump(defaults, defaults_file)
+
+    shutil.copy(os.path.join(base_dir, 'paths.json'), maze_dir)
+    os.symlink(os.path.join(base_dir, 'assets'),
+               os.path.join(maze_dir, 'assets'))
+    os.mkdir(os.path.join(maze_dir, 'levels'))
+    with open(os.path.join(maze_dir, 'levels', 'bench.txt'), 'w',
+              encoding='utf-8') as maze_file:
+        maze_file.write(make_maze(width, height))
+
+    return maze_dir
+
+
+def time_phase(phase: Callable, setup: Callable = None,
+               repeats: int = REPEATS) -> dict:
+    """ Runs 'phase' 'repeats' times, calling 'setup' before each run
+    untimed, and returns the best and mean time in seconds. """
+
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        phase()
+        times.append(time.perf_counter() - start)
+
+    return {'best': min(times), 'mean': sum(times) / len(times)}
+
+
+def run_maze(base_dir: str) -> dict:
+    """ Times every phase of the game in 'base_dir'. """
+
+    # pylint: disable=import-outside-toplevel
+    from game.game_state import GameState
+    from game.input_source import ScriptedInput, KEY_NAMES
+    from game.pacman import Pacman
+    from game.spawner import Spawner
+    from game.texture_loader import TextureLoader
+
+    pacman = Pacman(GameState.RUNNING, base_dir, headless=True)
+    pacman.init_gfx()
+    results = {
+        'width_units': pacman.constants.width_units,
+        'height_units': pacman.constants.height_units
+    }
+
+    results['load_json_dict'] = time_phase(lambda: (
+        loader.load_json_dict(os.path.join(base_dir, 'defaults.json')),
+        loader.load_json_dict(os.path.join(base_dir, 'paths.json'))))
+    # the level is already compiled, the maps and the graphs are built
+    results['load_level'] = time_phase(lambda: pacman.load_level(0))
+
+    # textures are timed decoded from the image files and from the cache
+    cache_path = os.path.join(tempfile.mkdtemp(), 'textures.cache')
+    results['load_all_textures'] = time_phase(
+        lambda: TextureLoader(pacman.assets_dir, pacman.defaults,
+                              pacman.paths,
+                              convert=False).load_all_textures())
+    TextureLoader(pacman.assets_dir, pacman.defaults, pacman.paths,
+                  cache_path, convert=False).load_all_textures()
+    results['load_all_textures_cached'] = time_phase(
+        lambda: TextureLoader(pacman.assets_dir, pacman.defaults,
+                              pacman.paths, cache_path,
+                              convert=False).load_all_textures())
+    pacman.textures = TextureLoader(pacman.assets_dir, pacman.defaults,
+                                    pacman.paths,
+                                    convert=False).load_all_textures()
+
+    # every spawn starts from an empty background and object groups
+    spawner: Spawner = None
+
+    def new_spawner():
+        nonlocal spawner
+        spawner = Spawner(pacman.textures, pacman.defaults, {},
+                          pacman.constants, pacman.level_data,
+                          pacman.background.copy()
+                          if pacman.defaults['render']['static_layers']
+                          else None)
+
+    results['spawn_immobile'] = time_phase(
+        lambda: spawner.spawn_immobile(), new_spawner)
+    results['spawn_mobile'] = time_phase(
+        lambda: spawner.spawn_mobile(), new_spawner)
+
+    # steady state update with pac walking around in circles
+    pacman.spawn_default()
+    pacman.draw()
+    update = pacman.update
+    update_times = []
+
+    def timed_update():
+        start = time.perf_counter()
+        update()
+        update_times.append(time.perf_counter() - start)
+
+    pacman.update = timed_update
+    arrows = [KEY_NAMES[name] for name in ('up', 'right', 'down', 'left')]
+    pacman.run(ScriptedInput([(20, frozenset([arrows[step % 4]]))
+                              for step in range(FRAMES // 20)]))
+    # the first frames draw what spawning left behind
+    update_times = sorted(update_times[len(update_times) // 10:])
+    results['update'] = {
+        'best': update_times[0],
+        'mean': sum(update_times) / len(update_times),
+        'p95': update_times[int(len(update_times) * 0.95)]
+    }
+    results['ticks_per_second'] = pacman.ticks_per_second
+    return results
+
+
+def get_commit() -> str | None:
+    """ Returns the checked out commit, if any. """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, previous: dict) -> list[str]:
+    """ Returns the phases whose best time grew by more than
+    REGRESSION_RATIO since the previous results. The best time is the
+    least affected by noise. """
+
+    regressions = []
+    for maze, phases in results['mazes'].items():
+        for phase, timing in phases.items():
+            if not isinstance(timing, dict):
+                continue
+            try:
+                before = previous['mazes'][maze][phase]['best']
+            except (KeyError, TypeError):
+                continue
+            ratio = timing['best'] / before if before else 1.0
+            print(f'{maze:>10} {phase:>25} {ratio:>6.2f}x')
+            if ratio > REGRESSION_RATIO:
+                regressions.append(f'{maze} {phase}')
+
+    return regressions
+
+
+def main():
+    """ Runs the suite on the default level and the synthetic mazes, each
+    in its own process, and stores the results. """
+
+    parser = argparse.ArgumentParser(description='Pacman benchmark suite.')
+    parser.add_argument('-o', '--output', default='benchmark.json',
+                        help='JSON file to store the results in')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='JSON results of a previous run')
+    parser.add_argument('--maze', metavar='DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # a single maze is benchmarked in a subprocess
+    if args.maze:
+        logging.disable()
+        print(json.dumps(run_maze(args.maze)))
+        return
+
+    base_dir = os.getcwd()
+    defaults = loader.load_json_dict(os.path.join(base_dir, 'defaults.json'))
+    mazes = {'default': base_dir}
+    for scale in MAZE_SCALES:
+        width = defaults['game']['width_units'] * scale
+        height = defaults['game']['height_units'] * scale
+        mazes[f'{width}x{height}'] = make_base_dir(width, height, base_dir)
+
+    results = {
+        'commit': get_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'mazes': {}
+    }
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy')
+    try:
+        for name, maze_dir in mazes.items():
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.suite', '--maze',
+                 maze_dir],
+                check=True, capture_output=True, text=True, env=env).stdout
+            results['mazes'][name] = json.loads(output.splitlines()[-1])
+
+            print(f'{name}:')
+            for phase, timing in results['mazes'][name].items():
+                if isinstance(timing, dict):
+                    print(f'{phase:>25} {timing["best"] * 1e3:>10.3f} ms '
+                          f'best {timing["mean"] * 1e3:>10.3f} ms mean')
+    finally:
+        # the synthetic mazes are removed even if a benchmark fails
+        for maze_dir in mazes.values():
+            if maze_dir != base_dir:
+                shutil.rmtree(maze_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump(results, output_file, indent='\t')
+    print(f'Results stored in {args.output}.')
+
+    if args.compare:
+        previous = loader.load_json_dict(args.compare)
+        print(f'Compared with {previous.get("commit")}:')
+        regressions = compare(results, previous)
+        if regressions:
+            print('Regressions: ' + ', '.join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+""" Benchmarks the throughput of the vectorized environments in environment
+steps per second, in a single process and sharded across worker
+processes. Run from the pacman directory:
+
+    python -m benchmarks.vector_env
+"""
+
+import logging
+import os
+import random
+import time
+
+from game.vector_env import VectorEnv, ShardedVectorEnv, UP, LEFT
+
+NUM_ENVS = [1, 64, 1024]
+WORKERS = [2, 4]
+STEPS = 200
+
+
+def measure(env: VectorEnv | ShardedVectorEnv, rnd: random.Random) -> float:
+    """ Steps 'env' with random actions and returns environment steps per
+    second. """
+
+    # actions are drawn up front not to time the random generator
+    actions = [[rnd.randint(UP, LEFT) for _ in range(env.num_envs)]
+               for _ in range(STEPS)]
+    env.reset()
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    return STEPS * env.num_envs / (time.perf_counter() - start)
+
+
+def main():
+    """ Measures every environment count in a single process and with every
+    number of workers. """
+
+    logging.disable()
+    rnd = random.Random(0)
+    base_dir = os.getcwd()
+    print(f'{"envs":>6} {"workers":>8} {"steps/s":>12}')
+    for num_envs in NUM_ENVS:
+        steps_per_second = measure(VectorEnv(base_dir, num_envs), rnd)
+        print(f'{num_envs:>6} {"-":>8} {steps_per_second:>12.0f}')
+        for workers in WORKERS:
+            env = ShardedVectorEnv(base_dir, num_envs, workers)
+            steps_per_second = measure(env, rnd)
+            env.close()
+            print(f'{num_envs:>6} {workers:>8} {steps_per_second:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+""" Contains the animation scheduler. """
+
+from collections import defaultdict
+
+from game.game_object import GameObject
+
+
+def is_animated(sprite: GameObject) -> bool:
+    """ Tests if the sprite has any animation with more than one frame. """
+
+    animations = getattr(sprite, 'animation_dict', {}).values()
+    return len(sprite.animation) > 1 or\
+        any(len(animation) > 1 for animation in animations)
+
+
+class AnimationScheduler:
+    """ Steps sprite animations at the rate of their object type
+    independently of the game tick. Sprites are kept in buckets by the tick
+    of their next frame, so a tick only visits the sprites whose frame
+    changes. Sprites with a single frame are never scheduled. """
+
+    def __init__(self, animation_fps: dict[str, float], tick_rate: float):
+        self.animation_fps = animation_fps
+        self.tick_rate = tick_rate
+        self.tick = 0
+        self.buckets: dict[int, list[GameObject]] = defaultdict(list)
+        self.periods: dict[GameObject, int] = {}
+        self.next_ticks: dict[GameObject, int] = {}
+
+    def get_period(self, sprite: GameObject) -> int:
+        """ Returns the number of ticks between the frames of the sprite,
+        given by the animation rate of its type, e.g. 'ghost' for
+        'ghost_red_ghost'. """
+
+        fps = self.animation_fps.get(sprite.type.split('_')[0],
+                                     self.animation_fps['default'])
+        return max(1, round(self.tick_rate / fps))
+
+    def add(self, sprite: GameObject) -> None:
+        """ Schedules the sprite if it is animated. """
+
+        if sprite in self.periods or not is_animated(sprite):
+            return
+
+        self.periods[sprite] = self.get_period(sprite)
+        self.__schedule(sprite)
+
+    def remove(self, sprite: GameObject) -> None:
+        """ Stops animating the sprite. """
+
+        self.periods.pop(sprite, None)
+        self.next_ticks.pop(sprite, None)
+
+    def __schedule(self, sprite: GameObject) -> None:
+        """ Puts the sprite into the bucket of its next frame. """
+
+        next_tick = self.tick + self.periods[sprite]
+        self.next_ticks[sprite] = next_tick
+        self.buckets[next_tick].append(sprite)
+
+    def step(self) -> list[GameObject]:
+        """ Advances the clock by a tick and steps the animations due.
+        Returns the sprites whose frame changed. """
+
+        self.tick += 1
+        stepped = []
+        for sprite in self.buckets.pop(self.tick, []):
+            # skip sprites removed or rescheduled meanwhile
+            if self.next_ticks.get(sprite) != self.tick:
+                continue
+            sprite.update()
+            stepped.append(sprite)
+            self.__schedule(sprite)
+
+        return stepped
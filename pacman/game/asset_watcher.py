@@ -0,0 +1,96 @@
+""" Contains the watcher of the files hot reloaded while the game runs. """
+
+import logging
+import os
+
+from auxil import loader
+from game.texture_loader import TextureLoader, get_family_paths
+
+# config files watched in the game directory
+CONFIG_FILES = ['defaults.json', 'paths.json']
+
+
+class AssetWatcher:
+    """ Polls the modification times of defaults.json, paths.json and the
+    files of every texture family named in them. Folders of frame files
+    are listed as well to notice added and removed frames. Polling the few
+    hundred files of the game is cheap enough to do every second.
+
+    The texture families are taken once, as changing the objects of the
+    game needs a restart anyway. """
+
+    def __init__(self, base_dir: str, txtr_loader: TextureLoader):
+        self.base_dir = base_dir
+        self.txtr_loader = txtr_loader
+        self.families = txtr_loader.get_families()
+        self.config_stamps: dict[str, int | None] = {}
+        self.family_stamps: dict[tuple[str, str | None], tuple] = {}
+        self.scan()
+
+    def __get_stamp(self, path: str) -> int | None:
+        """ Returns the modification time of 'path' or None if it is
+        missing. """
+
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def __get_family_stamp(self, obj: str, family: str | None) -> tuple:
+        """ Returns the paths and modification times of all the files of
+        the texture family. """
+
+        assets_dir = self.txtr_loader.assets_dir
+        stamp = []
+        family_paths = get_family_paths(self.txtr_loader.txtr_paths, obj,
+                                        family) or {}
+        for spec in family_paths.values():
+            if loader.is_sheet(spec):
+                path = os.path.join(assets_dir, *spec['sheet'].split('/'))
+                stamp.append((path, self.__get_stamp(path)))
+                continue
+
+            folder_path = os.path.join(assets_dir, *spec.split('/'))
+            try:
+                with os.scandir(folder_path) as entries:
+                    stamp += sorted((entry.path, entry.stat().st_mtime_ns)
+                                    for entry in entries)
+            except OSError:
+                stamp.append((folder_path, None))
+
+        return tuple(stamp)
+
+    def scan(self) -> None:
+        """ Takes the current state of all the watched files, e.g. after
+        the texture paths changed. """
+
+        self.config_stamps = {
+            name: self.__get_stamp(os.path.join(self.base_dir, name))
+            for name in CONFIG_FILES}
+        self.family_stamps = {
+            (obj, family): self.__get_family_stamp(obj, family)
+            for obj, families in self.families.items()
+            for family in families}
+
+    def poll(self) -> tuple[list[str], list[tuple[str, str | None]]]:
+        """ Returns the config files and the texture families changed since
+        the last poll. """
+
+        changed_files = []
+        for name, stamp in self.config_stamps.items():
+            current = self.__get_stamp(os.path.join(self.base_dir, name))
+            if current != stamp:
+                self.config_stamps[name] = current
+                changed_files.append(name)
+
+        changed_families = []
+        for key, stamp in self.family_stamps.items():
+            current = self.__get_family_stamp(*key)
+            if current != stamp:
+                self.family_stamps[key] = current
+                changed_families.append(key)
+
+        if changed_files or changed_families:
+            logging.info('Changed files: %s, changed texture families: %s.',
+                         changed_files, changed_families)
+        return changed_files, changed_families
@@ -0,0 +1,115 @@
+""" Contains the coin field class. """
+
+from pygame import Rect, Surface
+
+from game.level import Level
+
+# coin cell values
+EMPTY = 0
+NORMAL = 1
+ENERGIZER = 2
+COIN_TYPES = {NORMAL: 'normal', ENERGIZER: 'energizer'}
+
+
+class CoinField:
+    """ Grid of the maze tiles storing which coin lies on a tile. Coins are
+    drawn from the grid instead of being sprites. """
+
+    def __init__(self, width_units: int, height_units: int,
+                 pixels_per_unit: int):
+        self.width_units = width_units
+        self.height_units = height_units
+        self.pixels_per_unit = pixels_per_unit
+        # cells shared with snapshots are immutable bytes until changed
+        self.cells: bytearray | bytes = bytearray(width_units * height_units)
+        self.remaining = 0
+
+    @classmethod
+    def from_level(cls, level: Level, pixels_per_unit: int) -> 'CoinField':
+        """ Copies the precomputed coins of a compiled level. """
+
+        coin_field = cls(level.width_units, level.height_units,
+                         pixels_per_unit)
+        coin_field.cells[:] = level.coins
+        coin_field.remaining = len(coin_field.cells) -\
+            coin_field.cells.count(EMPTY)
+        return coin_field
+
+    def set_coin(self, row: int, col: int, coin: int) -> None:
+        """ Puts 'coin' on the tile (row, col), replacing any coin there. """
+
+        index = row * self.width_units + col
+        self.remaining += bool(coin) - bool(self.cells[index])
+        self.__own_cells()
+        self.cells[index] = coin
+
+    def coin_at(self, row: int, col: int) -> int:
+        """ Returns the coin on the tile (row, col). Tiles outside the maze
+        are empty. """
+
+        if 0 <= row < self.height_units and 0 <= col < self.width_units:
+            return self.cells[row * self.width_units + col]
+        return EMPTY
+
+    def eat(self, row: int, col: int) -> int:
+        """ Removes the coin from the tile (row, col) and returns it. Returns
+        EMPTY if there was no coin. """
+
+        coin = self.coin_at(row, col)
+        if coin:
+            self.__own_cells()
+            self.cells[row * self.width_units + col] = EMPTY
+            self.remaining -= 1
+
+        return coin
+
+    def __own_cells(self) -> None:
+        """ Copies cells shared with a snapshot before changing them. """
+
+        if isinstance(self.cells, bytes):
+            self.cells = bytearray(self.cells)
+
+    def snapshot(self) -> tuple[bytes, int]:
+        """ Returns the cells and the number of coins remaining. The cells
+        are shared with the field until either changes. """
+
+        if not isinstance(self.cells, bytes):
+            self.cells = bytes(self.cells)
+        return self.cells, self.remaining
+
+    def restore(self, state: tuple[bytes, int]) -> None:
+        """ Restores cells returned by 'snapshot' without copying them. """
+
+        self.cells, self.remaining = state
+
+    def tile_rect(self, row: int, col: int) -> Rect:
+        """ Returns the screen rect of the tile (row, col). """
+
+        return Rect(col * self.pixels_per_unit, row * self.pixels_per_unit,
+                    self.pixels_per_unit, self.pixels_per_unit)
+
+    def draw(self, surface: Surface, textures: dict[str, list[Surface]],
+             color: tuple[int, int, int] = None) -> list[Rect]:
+        """ Draws all the remaining coins onto 'surface' and returns their
+        rects. Their tiles are filled with 'color' first if given, e.g. to
+        draw them again. """
+
+        drawn = []
+        for index, coin in enumerate(self.cells):
+            if coin:
+                row, col = divmod(index, self.width_units)
+                rect = self.tile_rect(row, col)
+                if color:
+                    surface.fill(color, rect)
+                surface.blit(textures[COIN_TYPES[coin]][0], rect)
+                drawn.append(rect)
+        return drawn
+
+    def erase(self, row: int, col: int, surface: Surface,
+              color: tuple[int, int, int]) -> Rect:
+        """ Fills the tile (row, col) of 'surface' with 'color' and returns
+        the dirty rect. """
+
+        rect = self.tile_rect(row, col)
+        surface.fill(color, rect)
+        return rect
@@ -0,0 +1,177 @@
+""" Contains the maze distance fields used for pathfinding. """
+
+import logging
+from array import array
+from collections import deque
+
+from game.movement_direction import MovementDirection
+from game.passability import PassabilityMap, ALL_BLOCKED
+
+# distance of tiles which cannot reach the target
+UNREACHABLE = 0xFFFF
+# direction codes stored in the fields, 0 means no direction
+DIRECTIONS = [None, MovementDirection.UP, MovementDirection.RIGHT,
+              MovementDirection.DOWN, MovementDirection.LEFT]
+STEPS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+
+
+class DistanceField:
+    """ Shortest path distances and next step directions between all the
+    walkable tiles of the maze for objects blocked by 'flags'.
+
+    Every tile which is not a wall for everyone is a node, so that doors
+    can open and close without renumbering. The field of a target tile holds
+    the distance of every node to the target and the direction of its first
+    step towards it. Fields are built on first use or all at once by
+    'build'; only built fields take memory. """
+
+    def __init__(self, passability: PassabilityMap, flags: int):
+        self.width_units = passability.width_units
+        self.height_units = passability.height_units
+        self.nodes: list[int] = []
+        self.node_index = array('i', [-1]) * len(passability.tiles)
+        for tile, tile_flags in enumerate(passability.tiles):
+            if tile_flags & ALL_BLOCKED != ALL_BLOCKED:
+                self.node_index[tile] = len(self.nodes)
+                self.nodes.append(tile)
+        self.open = bytearray(not passability.tiles[tile] & flags
+                              for tile in self.nodes)
+
+        # neighbour nodes of every node in the order of directions
+        self.neighbours: list[list[tuple[int, int]]] = []
+        for tile in self.nodes:
+            row, col = divmod(tile, self.width_units)
+            node_neighbours = []
+            for code, (row_step, col_step) in enumerate(STEPS, 1):
+                node = self.__get_node(row + row_step, col + col_step)
+                if node >= 0:
+                    node_neighbours.append((node, code))
+            self.neighbours.append(node_neighbours)
+
+        # fields of every target node, None until built
+        self.distances: list[array | None] = [None] * len(self.nodes)
+        self.directions: list[bytearray | None] = [None] * len(self.nodes)
+
+    def __get_node(self, row: int, col: int) -> int:
+        """ Returns the node of the tile (row, col) or -1. """
+
+        if 0 <= row < self.height_units and 0 <= col < self.width_units:
+            return self.node_index[row * self.width_units + col]
+        return -1
+
+    def __build_field(self, target: int) -> None:
+        """ Runs BFS from the target node over open nodes. """
+
+        count = len(self.nodes)
+        distances = self.distances[target] = array('H', [UNREACHABLE]) * count
+        directions = self.directions[target] = bytearray(count)
+        if not self.open[target]:
+            return
+
+        distances[target] = 0
+        queue = deque([target])
+        while queue:
+            node = queue.popleft()
+            distance = distances[node] + 1
+            for neighbour, code in self.neighbours[node]:
+                if self.open[neighbour] and\
+                        distances[neighbour] == UNREACHABLE:
+                    distances[neighbour] = distance
+                    # the step back to 'node' is the opposite direction
+                    directions[neighbour] = (code + 1) % 4 + 1
+                    queue.append(neighbour)
+
+    def __patch_field(self, target: int, node: int, is_open: bool) -> bool:
+        """ Updates only the entry of 'node' in the target's field if the
+        change of 'node' cannot change any other entry. Returns False if
+        the field has to be rebuilt. """
+
+        distances = self.distances[target]
+        directions = self.directions[target]
+        if not is_open:
+            # the closed node only matters if some path steps into it
+            for neighbour, code in self.neighbours[node]:
+                if directions[neighbour] == (code + 1) % 4 + 1:
+                    return False
+            distances[node] = UNREACHABLE
+            directions[node] = 0
+            return True
+
+        # the opened node only shortens paths between its neighbours if
+        # their distances differ by more than two
+        reached = [(distances[neighbour], code)
+                   for neighbour, code in self.neighbours[node]
+                   if self.open[neighbour]]
+        if not reached:
+            return True
+        if max(reached)[0] - min(reached)[0] > 2:
+            return False
+        distance, code = min(reached)
+        if distance != UNREACHABLE:
+            distances[node] = distance + 1
+            directions[node] = code
+        return True
+
+    def __get_target(self, to_tile: tuple[int, int]) -> int:
+        """ Returns the target node of the tile (row, col), building its
+        field first if needed. Returns -1 for tiles which are not nodes. """
+
+        target = self.__get_node(*to_tile)
+        if target >= 0 and self.distances[target] is None:
+            self.__build_field(target)
+        return target
+
+    def build(self) -> None:
+        """ Builds the fields of all the targets. """
+
+        logging.debug('Building %s distance fields...', len(self.nodes))
+        for target in range(len(self.nodes)):
+            if self.distances[target] is None:
+                self.__build_field(target)
+        logging.debug('Distance fields built.')
+
+    def distance(self, from_tile: tuple[int, int],
+                 to_tile: tuple[int, int]) -> int | None:
+        """ Returns the length of the shortest path between the tiles given
+        as (row, col) or None if there is no path. """
+
+        target = self.__get_target(to_tile)
+        node = self.__get_node(*from_tile)
+        if target < 0 or node < 0 or\
+                self.distances[target][node] == UNREACHABLE:
+            return None
+        return self.distances[target][node]
+
+    def direction(self, from_tile: tuple[int, int],
+                  to_tile: tuple[int, int]) -> MovementDirection | None:
+        """ Returns the direction of the first step on the shortest path
+        between the tiles given as (row, col). Returns None if there is no
+        path or the tiles are the same. """
+
+        target = self.__get_target(to_tile)
+        node = self.__get_node(*from_tile)
+        if target < 0 or node < 0:
+            return None
+        return DIRECTIONS[self.directions[target][node]]
+
+    def set_open(self, tile: tuple[int, int], is_open: bool) -> int:
+        """ Opens or closes the tile (row, col), e.g. the prison door, and
+        rebuilds only the fields the change can affect. Returns the number
+        of rebuilt fields. """
+
+        node = self.__get_node(*tile)
+        if node < 0 or self.open[node] == is_open:
+            return 0
+
+        self.open[node] = is_open
+        rebuilt = 0
+        for target, distances in enumerate(self.distances):
+            if distances is None or target != node and\
+                    self.__patch_field(target, node, is_open):
+                continue
+            self.__build_field(target)
+            rebuilt += 1
+
+        logging.debug('Tile %s %s, %s distance fields rebuilt.', tile,
+                      'opened' if is_open else 'closed', rebuilt)
+        return rebuilt
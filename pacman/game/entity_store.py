@@ -0,0 +1,142 @@
+""" Contains the struct-of-arrays store of mobile entities. """
+
+from array import array
+
+from pygame import Rect
+from pygame.sprite import Sprite
+
+from game.distance_field import DIRECTIONS
+from game.movement_direction import MovementDirection
+from game.passability import PassabilityMap
+
+DIRECTION_CODES = {direction: code for code, direction in
+                   enumerate(DIRECTIONS) if direction}
+
+
+class EntityStore:
+    """ State of all the mobile entities in contiguous arrays indexed by
+    entity id: positions, sizes, velocities, directions, moving flags and
+    the passability flags blocking them. Sprites drawing the entities are
+    thin views of the arrays, kept in 'views'.
+
+    Velocities are whole pixels per tick, fractions are dropped like
+    Rect.move does. """
+
+    def __init__(self):
+        self.x = array('i')
+        self.y = array('i')
+        self.w = array('i')
+        self.h = array('i')
+        self.vx = array('i')
+        self.vy = array('i')
+        self.directions = bytearray()
+        self.moving = bytearray()
+        self.blocked_by = bytearray()
+        self.types: list[str] = []
+        self.views: list[Sprite] = []
+        self.ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def add(self, type: str, rect: Rect, blocked_by: int,
+            view: Sprite = None) -> int:
+        """ Adds an entity standing still and facing up at 'rect'. Returns
+        its id. """
+
+        entity = len(self.types)
+        self.x.append(rect.x)
+        self.y.append(rect.y)
+        self.w.append(rect.w)
+        self.h.append(rect.h)
+        self.vx.append(0)
+        self.vy.append(0)
+        self.directions.append(DIRECTION_CODES[MovementDirection.UP])
+        self.moving.append(False)
+        self.blocked_by.append(blocked_by)
+        self.types.append(type)
+        self.views.append(view)
+        self.ids[type] = entity
+        return entity
+
+    def get_id(self, type: str) -> int | None:
+        """ Returns the id of the entity of type 'type'. """
+
+        return self.ids.get(type)
+
+    def rect(self, entity: int) -> Rect:
+        """ Returns a new rect of the entity. """
+
+        return Rect(self.x[entity], self.y[entity],
+                    self.w[entity], self.h[entity])
+
+    def set_rect(self, entity: int, rect: Rect) -> None:
+        """ Places the entity at 'rect'. """
+
+        self.x[entity], self.y[entity], self.w[entity], self.h[entity] =\
+            rect
+
+    def direction(self, entity: int) -> MovementDirection:
+        """ Returns the direction the entity is facing. """
+
+        return DIRECTIONS[self.directions[entity]]
+
+    def set_velocity(self, entity: int, vector: tuple[float, float],
+                     direction: MovementDirection) -> None:
+        """ Sets the velocity and direction of the entity. """
+
+        self.vx[entity] = int(vector[0])
+        self.vy[entity] = int(vector[1])
+        self.directions[entity] = DIRECTION_CODES[direction]
+
+    def velocity(self, entity: int) -> tuple[int, int]:
+        """ Returns the velocity of the entity. """
+
+        return (self.vx[entity], self.vy[entity])
+
+    def move(self, entity: int) -> None:
+        """ Moves the entity by its velocity. """
+
+        self.x[entity] += self.vx[entity]
+        self.y[entity] += self.vy[entity]
+
+    def is_blocked(self, entity: int, passability: PassabilityMap) -> bool:
+        """ Tests if the entity overlaps a tile blocking it. """
+
+        return passability.is_blocked(self.rect(entity),
+                                      self.blocked_by[entity])
+
+    def advance(self, pixels_per_unit: int) -> list[int]:
+        """ Moves all the moving entities by their velocity in one pass.
+        Entities which reached whole game units stop instead. Returns the
+        ids of the moved entities. """
+
+        moved = []
+        x, y, moving = self.x, self.y, self.moving
+        for entity in range(len(moving)):
+            if not moving[entity]:
+                continue
+            if x[entity] % pixels_per_unit or y[entity] % pixels_per_unit:
+                x[entity] += self.vx[entity]
+                y[entity] += self.vy[entity]
+                moved.append(entity)
+            else:
+                moving[entity] = False
+
+        return moved
+
+    def snapshot(self) -> tuple[bytes, ...]:
+        """ Returns the state of all the entities which changes while
+        playing: positions, velocities, directions and moving flags. """
+
+        return (self.x.tobytes(), self.y.tobytes(), self.vx.tobytes(),
+                self.vy.tobytes(), bytes(self.directions),
+                bytes(self.moving))
+
+    def restore(self, state: tuple[bytes, ...]) -> None:
+        """ Overwrites the entity arrays in place with a state returned by
+        'snapshot' of the same entities. """
+
+        for field, data in zip((self.x, self.y, self.vx, self.vy,
+                                self.directions, self.moving), state):
+            memoryview(field).cast('B')[:] = data
@@ -0,0 +1,155 @@
+""" Contains the per-frame phase telemetry of the game loop. """
+
+import csv
+import logging
+import time
+from array import array
+
+import pygame as pg
+from pygame import Rect, Surface
+
+# phases of a frame in the order they run
+PHASES = ['wait', 'input', 'events', 'update', 'overlay', 'display']
+WAIT, INPUT, EVENTS, UPDATE, OVERLAY, DISPLAY = range(len(PHASES))
+PERCENTILES = [50, 95, 99]
+OVERLAY_COLOR = (255, 255, 0)
+
+
+class FrameTelemetry:
+    """ Times the phases of every frame into a ring buffer of the last
+    'capacity' frames preallocated up front. A frame whose work, i.e. all
+    but waiting for the clock, takes longer than 'budget' seconds is
+    counted as dropped. """
+
+    def __init__(self, capacity: int, budget: float):
+        self.capacity = capacity
+        self.budget = budget
+        # a row of phase durations per frame
+        self.durations = array('d', bytes(8 * capacity * len(PHASES)))
+        self.frame = 0
+        self.row = 0
+        self.last = 0.0
+        self.dropped = 0
+
+    def start_frame(self) -> None:
+        """ Starts timing the next frame, clearing its row. """
+
+        self.row = self.frame % self.capacity * len(PHASES)
+        for phase in range(len(PHASES)):
+            self.durations[self.row + phase] = 0.0
+        self.last = time.perf_counter()
+
+    def mark(self, phase: int) -> None:
+        """ Ends 'phase', which started when the previous phase ended. """
+
+        now = time.perf_counter()
+        self.durations[self.row + phase] += now - self.last
+        self.last = now
+
+    def end_frame(self) -> None:
+        """ Ends the frame and checks it against the budget. """
+
+        work = sum(self.durations[self.row + 1:self.row + len(PHASES)])
+        if self.budget and work > self.budget:
+            self.dropped += 1
+        self.frame += 1
+
+    def __rows(self) -> list[tuple[int, array]]:
+        """ Returns the frame numbers and rows of the buffered frames, oldest
+        first. """
+
+        first = max(0, self.frame - self.capacity)
+        return [(frame, self.durations[
+            frame % self.capacity * len(PHASES):
+            (frame % self.capacity + 1) * len(PHASES)])
+            for frame in range(first, self.frame)]
+
+    def percentiles(self) -> dict[str, list[float]]:
+        """ Returns the PERCENTILES of every phase and of the frame work over
+        the buffered frames in seconds. """
+
+        rows = [row for _, row in self.__rows()]
+        if not rows:
+            return {}
+
+        columns = {name: sorted(row[phase] for row in rows)
+                   for phase, name in enumerate(PHASES)}
+        columns['work'] = sorted(sum(row[1:]) for row in rows)
+        return {name: [values[min(len(values) - 1,
+                                  len(values) * percentile // 100)]
+                       for percentile in PERCENTILES]
+                for name, values in columns.items()}
+
+    def summary(self) -> list[str]:
+        """ Returns lines describing the percentiles in milliseconds and the
+        dropped frames, e.g. for an overlay. """
+
+        header = ' '.join(f'{f"p{percentile}":>6}'
+                          for percentile in PERCENTILES)
+        lines = [f'{"ms":>7} {header}']
+        lines += [f'{name:>7} ' + ' '.join(f'{value * 1e3:6.2f}'
+                                           for value in values)
+                  for name, values in self.percentiles().items()
+                  if name != 'wait']
+        lines.append(f'dropped {self.dropped} of {self.frame}')
+        return lines
+
+    def dump_csv(self, path: str) -> None:
+        """ Writes the buffered frames into the CSV file 'path', a row per
+        frame with the phase durations in seconds. """
+
+        logging.info('Writing frame telemetry into %s...', path)
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(['frame'] + PHASES)
+                for frame, row in self.__rows():
+                    writer.writerow([frame] + row.tolist())
+        except OSError as error:
+            logging.error('Error writing %s. Error: %s', path, error)
+            return
+
+        logging.info('Frame telemetry of %s frames written.',
+                     min(self.frame, self.capacity))
+
+
+class TelemetryOverlay:
+    """ Draws the telemetry summary onto the screen, refreshed every
+    'refresh' frames to keep its own cost low. In between, the last summary
+    is drawn again where moving objects were drawn over it. """
+
+    def __init__(self, telemetry: FrameTelemetry, refresh: int):
+        self.telemetry = telemetry
+        self.refresh = refresh
+        self.font = pg.font.Font(None, 18)
+        self.rect: Rect = None
+        self.image: Surface = None
+
+    def draw(self, screen: Surface, background: Surface,
+             changed_rects: list[Rect]) -> list[Rect]:
+        """ Redraws the overlay if due or if it intersects 'changed_rects'
+        drawn this frame and returns the changed rects. """
+
+        if self.telemetry.frame % self.refresh:
+            if self.rect and self.rect.collidelist(changed_rects) >= 0:
+                screen.blit(self.image, self.rect)
+                return [self.rect]
+            return []
+
+        rects = []
+        if self.rect:
+            screen.blit(background, self.rect, self.rect)
+            rects.append(self.rect)
+        lines = [self.font.render(line, True, OVERLAY_COLOR, (0, 0, 0))
+                 for line in self.telemetry.summary()]
+        width = max(line.get_width() for line in lines)
+        height = sum(line.get_height() for line in lines)
+        self.rect = Rect(0, 0, width, height)
+        self.image = Surface(self.rect.size)
+        top = 0
+        for line in lines:
+            self.image.blit(line, (0, top))
+            top += line.get_height()
+        screen.blit(self.image, self.rect)
+        rects.append(self.rect)
+        return rects
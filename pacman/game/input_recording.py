@@ -0,0 +1,123 @@
+""" Contains the recording and replay of player input. """
+
+import json
+import logging
+from typing import Sequence
+
+from game.input_source import (InputSource, PressedKeys, ScriptedInput,
+                               KEY_NAMES)
+
+RECORDING_VERSION = 1
+# keys stored in the recorded key masks, bit 0 first
+RECORDED_KEYS = ['up', 'right', 'down', 'left']
+
+
+def keys_to_mask(keys: Sequence[bool] | PressedKeys) -> int:
+    """ Packs the states of the recorded keys into a bit mask. """
+
+    return sum(1 << bit for bit, name in enumerate(RECORDED_KEYS)
+               if keys[KEY_NAMES[name]])
+
+
+def mask_to_keys(mask: int) -> frozenset[int]:
+    """ Unpacks a bit mask into the set of pressed keys. """
+
+    return frozenset(KEY_NAMES[name] for bit, name in enumerate(RECORDED_KEYS)
+                     if mask & 1 << bit)
+
+
+class InputRecording:
+    """ Run-length encoded key states of every tick of a game together with
+    the seed and level needed to replay it and the hash of the final game
+    state. """
+
+    def __init__(self, seed: int, level: int,
+                 steps: list[list[int]] = None, state_hash: str = None):
+        self.seed = seed
+        self.level = level
+        # steps of [ticks, key mask]
+        self.steps = steps or []
+        self.state_hash = state_hash
+
+    @property
+    def ticks(self) -> int:
+        """ Number of recorded ticks. """
+
+        return sum(ticks for ticks, _ in self.steps)
+
+    def append(self, mask: int) -> None:
+        """ Records the key mask of the next tick. """
+
+        if self.steps and self.steps[-1][1] == mask:
+            self.steps[-1][0] += 1
+        else:
+            self.steps.append([1, mask])
+
+    def to_input(self) -> ScriptedInput:
+        """ Returns an input source playing back the recording. """
+
+        return ScriptedInput([(ticks, mask_to_keys(mask))
+                              for ticks, mask in self.steps])
+
+    def save(self, path: str) -> None:
+        """ Writes the recording into the JSON file 'path'. """
+
+        logging.info('Saving input recording of %s ticks into %s...',
+                     self.ticks, path)
+        try:
+            with open(path, 'w', encoding='utf-8') as recording_file:
+                json.dump({
+                    'version': RECORDING_VERSION,
+                    'seed': self.seed,
+                    'level': self.level,
+                    'keys': RECORDED_KEYS,
+                    'steps': self.steps,
+                    'state_hash': self.state_hash
+                }, recording_file, separators=(',', ':'))
+        except IOError as error:
+            logging.error('Error writing %s. Error: %s', path, error)
+            raise SystemExit(f'Error writing {path}.') from error
+
+    @classmethod
+    def load(cls, path: str) -> 'InputRecording':
+        """ Reads a recording written by 'save'. """
+
+        logging.info('Reading input recording %s...', path)
+        try:
+            with open(path, 'r', encoding='utf-8') as recording_file:
+                data = json.load(recording_file)
+            if data['version'] != RECORDING_VERSION or\
+                    data['keys'] != RECORDED_KEYS:
+                raise ValueError(f'unsupported version {data["version"]}')
+            recording = cls(data['seed'], data['level'], data['steps'],
+                            data['state_hash'])
+        except IOError as error:
+            logging.error('Error reading %s. Error: %s', path, error)
+            raise SystemExit(f'Error reading {path}.') from error
+        except (ValueError, KeyError) as error:
+            logging.error('Error parsing input recording %s. Error: %s',
+                          path, error)
+            raise SystemExit(
+                f'Error parsing input recording {path}.') from error
+
+        logging.info('Input recording %s has %s ticks in %s steps.',
+                     path, recording.ticks, len(recording.steps))
+        return recording
+
+
+class RecordingInput(InputSource):
+    """ Passes the key states of another input source through and records
+    them. """
+
+    def __init__(self, source: InputSource, recording: InputRecording):
+        super().__init__()
+        self.source = source
+        self.recording = recording
+
+    def get_pressed(self) -> Sequence[bool] | PressedKeys:
+        keys = self.source.get_pressed()
+        self.finished = self.source.finished
+        # the tick reading a finished source is never run
+        if not self.finished:
+            self.recording.append(keys_to_mask(keys))
+        return keys
@@ -0,0 +1,98 @@
+""" Contains the sources of player input read by the game loop. """
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+import pygame as pg
+
+# key names used in input scripts
+KEY_NAMES = {
+    'up': pg.K_UP,
+    'down': pg.K_DOWN,
+    'left': pg.K_LEFT,
+    'right': pg.K_RIGHT
+}
+
+
+class PressedKeys:
+    """ Key states indexed by key like the result of
+    pygame.key.get_pressed. """
+
+    def __init__(self, keys: frozenset[int]):
+        self.keys = keys
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.keys
+
+
+class InputSource(ABC):
+    """ Defines the source of key states read every tick. """
+
+    def __init__(self):
+        self.finished = False
+
+    @abstractmethod
+    def get_pressed(self) -> Sequence[bool] | PressedKeys:
+        """ Returns the key states of the current tick. Sets 'finished' once
+        there is no more input. """
+        ...
+
+
+class KeyboardInput(InputSource):
+    """ Reads the keyboard. Never finishes. """
+
+    def get_pressed(self) -> Sequence[bool]:
+        return pg.key.get_pressed()
+
+
+class ScriptedInput(InputSource):
+    """ Plays back a script of key states. The script is a list of steps,
+    each holding the pressed keys for a number of ticks. """
+
+    def __init__(self, steps: list[tuple[int, frozenset[int]]]):
+        super().__init__()
+        self.steps = [(ticks, PressedKeys(keys)) for ticks, keys in steps]
+        self.released = PressedKeys(frozenset())
+        self.step = 0
+        self.step_tick = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ScriptedInput':
+        """ Reads a script with one step per line: the number of ticks
+        followed by the names of the pressed keys, e.g. '30 up left'. Empty
+        lines and lines starting with '#' are skipped. """
+
+        logging.info('Reading input script %s...', path)
+        steps = []
+        try:
+            with open(path, 'r', encoding='utf-8') as script_file:
+                for line in script_file:
+                    if not line.strip() or line.startswith('#'):
+                        continue
+                    ticks, *names = line.split()
+                    steps.append((int(ticks), frozenset(
+                        KEY_NAMES[name.lower()] for name in names)))
+        except IOError as error:
+            logging.error('Error reading %s. Error: %s', path, error)
+            raise SystemExit(f'Error reading {path}.') from error
+        except (ValueError, KeyError) as error:
+            logging.error('Error parsing input script %s. Error: %s',
+                          path, error)
+            raise SystemExit(f'Error parsing input script {path}.') from error
+
+        logging.info('Input script %s has %s steps.', path, len(steps))
+        return cls(steps)
+
+    def get_pressed(self) -> PressedKeys:
+        # skip finished and empty steps
+        while self.step < len(self.steps) and\
+                self.step_tick >= self.steps[self.step][0]:
+            self.step += 1
+            self.step_tick = 0
+        if self.step >= len(self.steps):
+            self.finished = True
+            return self.released
+
+        self.step_tick += 1
+        return self.steps[self.step][1]
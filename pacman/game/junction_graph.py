@@ -0,0 +1,220 @@
+""" Contains the maze junction graph used for corridor-level movement. """
+
+import heapq
+import logging
+from array import array
+from typing import NamedTuple
+
+from game.distance_field import DIRECTIONS, STEPS
+from game.movement_direction import MovementDirection
+from game.passability import PassabilityMap
+
+
+class Corridor(NamedTuple):
+    """ A corridor leading from junction 'start' to junction 'end', both
+    tile indices. 'steps' holds the direction code of every step, the
+    first one leaving 'start' and the last one entering 'end', and
+    'tiles' the (row, col) of the tiles between the junctions. """
+
+    start: int
+    end: int
+    steps: bytes
+    tiles: tuple[tuple[int, int], ...]
+
+    @property
+    def length(self) -> int:
+        """ Returns the number of steps from 'start' to 'end'. """
+
+        return len(self.steps)
+
+
+class JunctionGraph:
+    """ Graph of the maze for objects blocked by 'flags', compiled once from
+    the passability map. Junctions, i.e. tiles with other than two open
+    neighbours, are the nodes and the corridors between them the edges
+    weighted by their length. Every corridor is stored once per direction.
+    A closed loop without junctions gets one of its tiles as a junction.
+
+    Objects only have to decide at junctions; in between they follow the
+    corridor without testing any tiles. """
+
+    def __init__(self, passability: PassabilityMap, flags: int):
+        self.width_units = passability.width_units
+        self.height_units = passability.height_units
+        self.open = bytearray(not tile_flags & flags
+                              for tile_flags in passability.tiles)
+        self.junctions: list[int] = []
+        self.junction_index = array('i', [-1]) * len(self.open)
+        self.corridors: list[Corridor] = []
+        # ids of the corridors leaving every junction
+        self.exits: list[list[int]] = []
+        # the two corridors through every corridor tile and the tile's
+        # position in them, -1 for other tiles
+        self.passages = array('i', [-1]) * (2 * len(self.open))
+        self.positions = array('i', [-1]) * (2 * len(self.open))
+
+        # direction codes of the open neighbours of every open tile
+        self.open_steps: list[tuple[int, ...]] = [()] * len(self.open)
+        for tile, is_open in enumerate(self.open):
+            if is_open:
+                self.open_steps[tile] = self.__get_open_steps(tile)
+                if len(self.open_steps[tile]) != 2:
+                    self.__add_junction(tile)
+        for junction in range(len(self.junctions)):
+            self.__add_exits(junction)
+        for tile, is_open in enumerate(self.open):
+            if is_open and self.passages[2 * tile] < 0 and\
+                    self.junction_index[tile] < 0:
+                self.__add_exits(self.__add_junction(tile))
+
+        logging.debug('Junction graph built with %s junctions and %s '
+                      'corridors.', len(self.junctions), len(self.corridors))
+
+    def __get_open_steps(self, tile: int) -> tuple[int, ...]:
+        """ Returns the direction codes of the open neighbours of 'tile'. """
+
+        row, col = divmod(tile, self.width_units)
+        return tuple(
+            code for code, (row_step, col_step) in enumerate(STEPS, 1)
+            if 0 <= row + row_step < self.height_units and
+            0 <= col + col_step < self.width_units and
+            self.open[tile + row_step * self.width_units + col_step])
+
+    def __add_junction(self, tile: int) -> int:
+        """ Makes 'tile' a junction and returns its number. """
+
+        self.junction_index[tile] = len(self.junctions)
+        self.junctions.append(tile)
+        self.exits.append([])
+        return len(self.junctions) - 1
+
+    def __add_exits(self, junction: int) -> None:
+        """ Walks the corridors leaving the junction. """
+
+        start = self.junctions[junction]
+        # tile offsets of the steps in the order of direction codes
+        offsets = [0] + [row_step * self.width_units + col_step
+                         for row_step, col_step in STEPS]
+        for code in self.open_steps[start]:
+            steps = bytearray([code])
+            tile = start + offsets[code]
+            tiles = []
+            while self.junction_index[tile] < 0:
+                tiles.append(tile)
+                # corridor tiles have one way on besides the way back
+                first, second = self.open_steps[tile]
+                code = second if first == (code + 1) % 4 + 1 else first
+                steps.append(code)
+                tile += offsets[code]
+
+            corridor = len(self.corridors)
+            for position, passed in enumerate(tiles, 1):
+                slot = 2 * passed + (self.passages[2 * passed] >= 0)
+                self.passages[slot] = corridor
+                self.positions[slot] = position
+            self.corridors.append(Corridor(
+                start, tile, bytes(steps),
+                tuple(divmod(passed, self.width_units) for passed in tiles)))
+            self.exits[junction].append(corridor)
+
+    def __get_tile_index(self, tile: tuple[int, int]) -> int:
+        """ Returns the index of the tile (row, col) or -1. """
+
+        row, col = tile
+        if 0 <= row < self.height_units and 0 <= col < self.width_units:
+            return row * self.width_units + col
+        return -1
+
+    def is_junction(self, tile: tuple[int, int]) -> bool:
+        """ Tests if the tile (row, col) is a junction. """
+
+        index = self.__get_tile_index(tile)
+        return index >= 0 and self.junction_index[index] >= 0
+
+    def get_exits(self, tile: tuple[int, int]) -> list[Corridor]:
+        """ Returns the corridors leaving the junction (row, col), empty for
+        other tiles. """
+
+        index = self.__get_tile_index(tile)
+        if index < 0 or self.junction_index[index] < 0:
+            return []
+        return [self.corridors[corridor]
+                for corridor in self.exits[self.junction_index[index]]]
+
+    def follow(self, tile: tuple[int, int], direction: MovementDirection)\
+            -> tuple[Corridor, int] | None:
+        """ Returns the corridor an object on the tile (row, col) follows
+        when moving in 'direction' and the number of steps it already made
+        in it. Returns None if the way is blocked. """
+
+        index = self.__get_tile_index(tile)
+        if index < 0 or not self.open[index]:
+            return None
+        code = DIRECTIONS.index(direction)
+        junction = self.junction_index[index]
+        if junction >= 0:
+            for corridor in self.exits[junction]:
+                if self.corridors[corridor].steps[0] == code:
+                    return self.corridors[corridor], 0
+            return None
+
+        for slot in (2 * index, 2 * index + 1):
+            corridor = self.corridors[self.passages[slot]]
+            if corridor.steps[self.positions[slot]] == code:
+                return corridor, self.positions[slot]
+        return None
+
+    def next_junction(self, tile: tuple[int, int],
+                      direction: MovementDirection)\
+            -> tuple[tuple[int, int], int] | None:
+        """ Returns the next junction (row, col) an object on the tile
+        (row, col) reaches moving in 'direction' and its distance, or None
+        if the way is blocked. """
+
+        followed = self.follow(tile, direction)
+        if followed is None:
+            return None
+        corridor, position = followed
+        return (divmod(corridor.end, self.width_units),
+                corridor.length - position)
+
+    def route(self, from_tile: tuple[int, int], to_tile: tuple[int, int])\
+            -> list[Corridor] | None:
+        """ Returns the corridors of the shortest route between the
+        junctions (row, col), empty if they are the same. Returns None if
+        either tile is not a junction or there is no route. """
+
+        start = self.__get_tile_index(from_tile)
+        target = self.__get_tile_index(to_tile)
+        if start < 0 or target < 0 or self.junction_index[start] < 0 or\
+                self.junction_index[target] < 0:
+            return None
+
+        start, target = self.junction_index[start], self.junction_index[target]
+        distances = {start: 0}
+        # corridor taken to reach every junction
+        came_by: dict[int, int] = {}
+        queue = [(0, start)]
+        while queue:
+            distance, junction = heapq.heappop(queue)
+            if junction == target:
+                break
+            if distance > distances[junction]:
+                continue
+            for corridor in self.exits[junction]:
+                end = self.junction_index[self.corridors[corridor].end]
+                end_distance = distance + self.corridors[corridor].length
+                if end_distance < distances.get(end, end_distance + 1):
+                    distances[end] = end_distance
+                    came_by[end] = corridor
+                    heapq.heappush(queue, (end_distance, end))
+
+        if target not in distances:
+            return None
+        route = []
+        while target != start:
+            corridor = self.corridors[came_by[target]]
+            route.append(corridor)
+            target = self.junction_index[corridor.start]
+        route.reverse()
+        return route
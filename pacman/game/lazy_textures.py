@@ -0,0 +1,132 @@
+""" Contains the lazily loaded texture mappings. """
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from pygame import Surface
+
+if TYPE_CHECKING:
+    from game.texture_loader import TextureLoader
+
+
+class LazyTextures(Mapping):
+    """ Textures of all the game objects. A texture family is only loaded
+    the first time it is asked for or when it is warmed in the background.
+    """
+
+    def __init__(self, txtr_loader: TextureLoader):
+        self.txtr_loader = txtr_loader
+        self.families: dict[str, list[str | None]] =\
+            txtr_loader.get_families()
+        self.objects: dict[str, Mapping] = {}
+        self.loaded: dict[tuple[str, str | None],
+                          dict[str, list[Surface]]] = {}
+        self.warming: dict[tuple[str, str | None], Future] = {}
+        self.executor: ThreadPoolExecutor = None
+        # families loaded on demand since the cache was last saved
+        self.unsaved = False
+
+    def __getitem__(self, obj: str) -> Mapping:
+        if obj not in self.objects:
+            if obj not in self.families:
+                raise KeyError(obj)
+            if self.families[obj] == [None]:
+                self.objects[obj] = self.get_family(obj, None)
+            else:
+                self.objects[obj] = LazyObjectTextures(self, obj)
+
+        return self.objects[obj]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.families)
+
+    def __len__(self) -> int:
+        return len(self.families)
+
+    def get_family(self, obj: str, family: str | None)\
+            -> dict[str, list[Surface]]:
+        """ Returns the textures of the family, loading them if needed.
+        Families being warmed in the background are waited for and only
+        converted. """
+
+        key = (obj, family)
+        if key not in self.loaded:
+            future = self.warming.pop(key, None)
+            if future:
+                logging.debug('Taking warmed %s %s textures.', obj, family)
+                textures = self.txtr_loader.finish_textures(future.result())
+            else:
+                logging.debug('Loading %s %s textures on demand.',
+                              obj, family)
+                textures = self.txtr_loader.load_family_textures(
+                    obj, family, self.txtr_loader.convert)
+                self.unsaved = True
+            self.loaded[key] = textures
+
+        return self.loaded[key]
+
+    def warm(self) -> None:
+        """ Starts decoding all the families not loaded yet in the
+        background. Conversion is left to the main thread. """
+
+        pending = [(obj, family) for obj, families in self.families.items()
+                   for family in families
+                   if (obj, family) not in self.loaded and
+                   (obj, family) not in self.warming]
+        if not pending:
+            return
+
+        logging.debug('Warming %s texture families...', len(pending))
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, self.txtr_loader.workers))
+        for obj, family in pending:
+            self.warming[(obj, family)] = self.executor.submit(
+                self.txtr_loader.load_family_textures, obj, family, False)
+        self.executor.shutdown(wait=False)
+
+    def collect_warmed(self) -> None:
+        """ Converts the families whose background decoding has finished.
+        Does not block. """
+
+        if not self.warming:
+            if self.unsaved:
+                self.save_cache()
+            return
+
+        for key, future in list(self.warming.items()):
+            if future.done():
+                self.get_family(*key)
+
+        if not self.warming:
+            logging.debug('All texture families warmed.')
+            self.save_cache()
+
+    def save_cache(self) -> None:
+        """ Writes the textures loaded so far into the texture cache. """
+
+        self.unsaved = False
+        self.txtr_loader.save_cache()
+
+
+class LazyObjectTextures(Mapping):
+    """ Textures of an object with several texture families, e.g. all the
+    ghost types. Families are loaded on first access. """
+
+    def __init__(self, textures: LazyTextures, obj: str):
+        self.textures = textures
+        self.obj = obj
+
+    def __getitem__(self, family: str) -> dict[str, list[Surface]]:
+        if family not in self.textures.families[self.obj]:
+            raise KeyError(family)
+
+        return self.textures.get_family(self.obj, family)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.textures.families[self.obj])
+
+    def __len__(self) -> int:
+        return len(self.textures.families[self.obj])
@@ -0,0 +1,73 @@
+""" Contains the compiled level class. """
+
+import logging
+import mmap
+import struct
+from typing import Iterator
+
+from game.wall_blocks import BLOCK_TYPE_NAMES
+
+# compiled level layout: header, ghost spawns, door tiles and then a byte
+# grid of every wall layer, the passability flags and the coins
+LEVEL_MAGIC = b'PLVL'
+LEVEL_VERSION = 1
+LEVEL_HEADER = struct.Struct('<4sHHHHHHH')
+LEVEL_TILE = struct.Struct('<HH')
+WALL_LAYERS = ['outer', 'inner', 'prison']
+
+
+class Level:
+    """ A compiled level memory-mapped from its file. All the grids are
+    read-only views of the file with one byte per tile. """
+
+    def __init__(self, path: str):
+        self.path = path
+        logging.info('Mapping level %s...', path)
+        try:
+            with open(path, 'rb') as level_file:
+                self.buffer = mmap.mmap(level_file.fileno(), 0,
+                                        access=mmap.ACCESS_READ)
+            (magic, version, self.width_units, self.height_units, pac_row,
+             pac_col, ghost_count, door_count) =\
+                LEVEL_HEADER.unpack_from(self.buffer)
+        except (OSError, ValueError, struct.error) as error:
+            logging.error('Error mapping level %s. Error: %s', path, error)
+            raise SystemExit(f'Error mapping level {path}.') from error
+        if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+            logging.error('Level %s has unknown format.', path)
+            raise SystemExit(f'Level {path} has unknown format.')
+
+        self.pac_spawn = (pac_row, pac_col)
+        offset = LEVEL_HEADER.size
+        self.ghost_spawn = self.__read_tiles(offset, ghost_count)
+        offset += ghost_count * LEVEL_TILE.size
+        self.prison_door = self.__read_tiles(offset, door_count)
+        offset += door_count * LEVEL_TILE.size
+
+        view = memoryview(self.buffer)
+        size = self.width_units * self.height_units
+        self.walls: dict[str, memoryview] = {}
+        for layer in WALL_LAYERS:
+            self.walls[layer] = view[offset:offset + size]
+            offset += size
+        self.passability = view[offset:offset + size]
+        offset += size
+        self.coins = view[offset:offset + size]
+        logging.info('Level %s mapped.', path)
+
+    def __read_tiles(self, offset: int, count: int)\
+            -> list[tuple[int, int]]:
+        """ Reads 'count' (row, col) tiles starting at 'offset'. """
+
+        return [LEVEL_TILE.unpack_from(self.buffer,
+                                       offset + index * LEVEL_TILE.size)
+                for index in range(count)]
+
+    def wall_blocks(self, layer: str) -> Iterator[tuple[int, int, str]]:
+        """ Yields (row, col, block type) of every unit of the wall
+        layer. """
+
+        for index, code in enumerate(self.walls[layer]):
+            if code:
+                row, col = divmod(index, self.width_units)
+                yield row, col, BLOCK_TYPE_NAMES[code]
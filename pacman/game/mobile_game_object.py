@@ -2,23 +2,49 @@
 
 from typing import Tuple
 from pygame import Rect, Surface
-from pygame.sprite import RenderUpdates, collide_rect, spritecollideany
 
 
+from game.entity_store import EntityStore
 from game.game_object import GameObject
 from game.movement_direction import MovementDirection
 
 
 class MobileGameObject(GameObject):
-    """ The mobile game object abstract base class. """
+    """ The mobile game object abstract base class. The state of the object
+    is kept in an entity store, the object only draws it. """
 
     def __init__(self, animation_dict: dict[str, list[Surface]], rect: Rect,
-                 type: str, destructible: bool):
+                 type: str, destructible: bool, entities: EntityStore,
+                 blocked_by: int):
+        # the entity must exist before the rect is set
+        self.entities = entities
+        self.id = entities.add(type, rect, blocked_by, self)
         super().__init__(animation_dict['up'], rect, type, destructible)
         self.animation_dict = animation_dict
-        self.direction = MovementDirection.UP
-        self.vector = (0, 0)
-        self.moving = False
+
+    @property
+    def rect(self) -> Rect:
+        return self.entities.rect(self.id)
+
+    @rect.setter
+    def rect(self, rect: Rect) -> None:
+        self.entities.set_rect(self.id, rect)
+
+    @property
+    def direction(self) -> MovementDirection:
+        return self.entities.direction(self.id)
+
+    @property
+    def vector(self) -> Tuple[int, int]:
+        return self.entities.velocity(self.id)
+
+    @property
+    def moving(self) -> bool:
+        return bool(self.entities.moving[self.id])
+
+    @moving.setter
+    def moving(self, moving: bool) -> None:
+        self.entities.moving[self.id] = moving
 
     def move(self, vector: Tuple[int, int] = None,
              direction: MovementDirection = None):
@@ -26,7 +52,8 @@ class MobileGameObject(GameObject):
         'direction'. """
 
         if vector and direction:
-            self.direction = direction
-            self.vector = vector
+            self.entities.set_velocity(self.id, vector, direction)
         self.animation = self.animation_dict[self.direction]
-        self.rect = self.rect.move(*self.vector)
+        self.image = self.animation[self.animation_frame %
+                                    len(self.animation)]
+        self.entities.move(self.id)
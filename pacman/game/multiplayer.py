@@ -0,0 +1,396 @@
+""" Contains the local network multiplayer: an authoritative game server
+running the Pacman game logic and thin clients drawing what it sends.
+
+Messages are framed by a header of the payload size and message type:
+
+    WELCOME  server -> client  the player's entity, the level and the full
+                               state: every entity and all the coin cells
+    DELTA    server -> client  a tick: the player's last applied input and
+                               only the entities which changed and the
+                               indices of the coins eaten
+    INPUT    client -> server  a new key mask of the player, sent only when
+                               the pressed keys change
+    FULL     server -> client  no entity left to play
+
+Players play the entities in the order they join: pac first, then the
+ghosts. """
+
+import asyncio
+import logging
+import struct
+import time
+from typing import Callable
+
+import pygame as pg
+from pygame import Rect
+
+from game.distance_field import DIRECTIONS
+from game.game_state import GameState
+from game.input_recording import keys_to_mask, RECORDED_KEYS
+from game.input_source import InputSource
+from game.pacman import Pacman
+
+WELCOME, DELTA, INPUT, FULL = range(1, 5)
+# payload size, message type
+HEADER = struct.Struct('<HB')
+# level, player entity, tick, entity count, coin cells size
+WELCOME_HEADER = struct.Struct('<BBIBH')
+# tick, last applied input of the player, entity count, eaten coin count
+DELTA_HEADER = struct.Struct('<IIBH')
+# entity, x, y, direction code with the moving flag in the top bit
+ENTITY = struct.Struct('<BhhB')
+COIN = struct.Struct('<H')
+# input sequence number, key mask
+INPUT_MESSAGE = struct.Struct('<IB')
+MOVING_FLAG = 0x80
+# bits of the key masks players may send
+KEY_MASK = (1 << len(RECORDED_KEYS)) - 1
+# clients which cannot keep up with this many bytes unsent are dropped
+MAX_WRITE_BUFFER = 1 << 16
+
+
+def frame(message_type: int, payload: bytes) -> bytes:
+    """ Returns the message with its header. """
+
+    return HEADER.pack(len(payload), message_type) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """ Reads the next message. Returns its type and payload. """
+
+    size, message_type = HEADER.unpack(
+        await reader.readexactly(HEADER.size))
+    return message_type, await reader.readexactly(size)
+
+
+class Player:
+    """ A connected player and the latest input it sent. """
+
+    def __init__(self, entity: int, writer: asyncio.StreamWriter):
+        self.entity = entity
+        self.writer = writer
+        self.mask = 0
+        self.sequence = 0
+
+
+class GameServer:
+    """ Runs the game logic of a headless Pacman game at 'tick_rate' ticks
+    per second, the game's max_fps by default, moving every entity by the
+    input of its player. After every tick the players are sent the delta
+    of the entities and coins since the previous tick, encoded once for
+    all of them. """
+
+    def __init__(self, base_dir: str, level: int = 0, seed: int = None,
+                 tick_rate: float = None):
+        self.pacman = Pacman(GameState.RUNNING, base_dir, headless=True,
+                             seed=seed, level=level)
+        self.pacman.init_gfx()
+        self.pacman.load_textures()
+        self.pacman.spawn_default()
+        self.tick_rate = tick_rate or self.pacman.defaults['game']['max_fps']
+        self.players: dict[int, Player] = {}
+        entities = self.pacman.entities
+        self.sent = self.__get_entity_states(range(len(entities)))
+        self.sent_coins = bytes(self.pacman.coins.cells)
+        self.delta_bytes = 0
+
+    def __get_entity_states(self, ids: range | list[int])\
+            -> dict[int, tuple[int, int, int]]:
+        """ Returns the position and the direction code with the moving flag
+        of the entities. """
+
+        entities = self.pacman.entities
+        return {entity: (entities.x[entity], entities.y[entity],
+                         entities.directions[entity] |
+                         MOVING_FLAG * entities.moving[entity])
+                for entity in ids}
+
+    def __encode_entities(self, states: dict[int, tuple[int, int, int]])\
+            -> bytes:
+        """ Packs the entity states. """
+
+        return b''.join(ENTITY.pack(entity, *state)
+                        for entity, state in states.items())
+
+    def __encode_welcome(self, entity: int) -> bytes:
+        """ Returns the full state for a player joining as 'entity'. """
+
+        cells = bytes(self.pacman.coins.cells)
+        return frame(WELCOME, WELCOME_HEADER.pack(
+            self.pacman.level, entity, self.pacman.ticks, len(self.sent),
+            len(cells)) + self.__encode_entities(self.sent) + cells)
+
+    def __apply_inputs(self) -> None:
+        """ Moves the entity of every player in the direction of the first
+        pressed key, in the priority of the keyboard controls. """
+
+        entities = self.pacman.entities
+        for player in self.players.values():
+            if player.mask:
+                bit = (player.mask & -player.mask).bit_length()
+                self.pacman.move_object(entities.types[player.entity],
+                                        DIRECTIONS[bit])
+
+    def __encode_delta(self) -> tuple[int, int, bytes]:
+        """ Returns the number of entities changed and coins eaten since the
+        last delta and their packed states and indices. """
+
+        states = self.__get_entity_states(range(len(self.pacman.entities)))
+        changed = {entity: state for entity, state in states.items()
+                   if self.sent[entity] != state}
+        self.sent = states
+
+        eaten = []
+        cells = self.pacman.coins.cells
+        if cells != self.sent_coins:
+            eaten = [index for index, (sent, cell) in
+                     enumerate(zip(self.sent_coins, cells)) if sent != cell]
+            self.sent_coins = bytes(cells)
+
+        return len(changed), len(eaten), self.__encode_entities(changed) +\
+            b''.join(COIN.pack(index) for index in eaten)
+
+    def tick(self) -> None:
+        """ Runs a tick of the game logic and sends its delta to all the
+        players. Nothing is animated or drawn on the server. """
+
+        self.__apply_inputs()
+        self.pacman.step()
+        self.pacman.ticks += 1
+
+        changed, eaten, delta = self.__encode_delta()
+        for player in list(self.players.values()):
+            payload = DELTA_HEADER.pack(self.pacman.ticks, player.sequence,
+                                        changed, eaten) + delta
+            player.writer.write(frame(DELTA, payload))
+            self.delta_bytes += HEADER.size + len(payload)
+            if player.writer.transport.get_write_buffer_size() >\
+                    MAX_WRITE_BUFFER:
+                logging.warning('Player %s cannot keep up. Dropping...',
+                                player.entity)
+                self.__drop_player(player)
+
+    def __drop_player(self, player: Player) -> None:
+        """ Disconnects the player, leaving its entity where it is. """
+
+        if self.players.get(player.entity) is player:
+            del self.players[player.entity]
+            player.writer.close()
+            logging.info('Player of entity %s left.', player.entity)
+
+    async def handle_player(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """ Welcomes a connecting player to the first free entity and reads
+        its inputs until it leaves. """
+
+        free = [entity for entity in range(len(self.pacman.entities))
+                if entity not in self.players]
+        if not free:
+            writer.write(frame(FULL, b''))
+            writer.close()
+            return
+
+        # pac is added last to the entity store, but is played first
+        entity = self.pacman.entities.get_id('pac')
+        if entity not in free:
+            entity = free[0]
+        player = self.players[entity] = Player(entity, writer)
+        writer.write(self.__encode_welcome(entity))
+        logging.info('Player joined as %s.',
+                     self.pacman.entities.types[entity])
+        try:
+            while True:
+                message_type, payload = await read_message(reader)
+                if message_type != INPUT:
+                    continue
+                if len(payload) != INPUT_MESSAGE.size:
+                    logging.warning('Player %s sent a bad input message. '
+                                    'Dropping...', entity)
+                    break
+                sequence, mask = INPUT_MESSAGE.unpack(payload)
+                if mask & ~KEY_MASK:
+                    logging.warning('Player %s sent unknown keys %s. '
+                                    'Dropping...', entity, mask)
+                    break
+                player.sequence, player.mask = sequence, mask
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.__drop_player(player)
+
+    async def serve(self, host: str, port: int, max_ticks: int = 0,
+                    started: Callable[[int], None] = None) -> None:
+        """ Accepts players on (host, port) and runs ticks until
+        'max_ticks' ticks, forever by default. 'started' is called with the
+        bound port, e.g. when port 0 picks a free one. """
+
+        server = await asyncio.start_server(self.handle_player, host, port)
+        port = server.sockets[0].getsockname()[1]
+        logging.info('Serving on %s:%s at %s ticks per second.', host, port,
+                     self.tick_rate)
+        if started:
+            started(port)
+
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        async with server:
+            while not max_ticks or self.pacman.ticks < max_ticks:
+                self.tick()
+                next_tick += 1 / self.tick_rate
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+            for player in list(self.players.values()):
+                self.__drop_player(player)
+        logging.info('Served %s ticks, %s delta bytes.', self.pacman.ticks,
+                     self.delta_bytes)
+
+
+class GameClient:
+    """ Thin client drawing the game state sent by a GameServer. The level
+    is spawned locally for drawing only; entities and coins are set from
+    the messages of the server and nothing is simulated. Keys are sent only
+    when they change. Headless clients draw into a surface. """
+
+    def __init__(self, base_dir: str, input_source: InputSource,
+                 headless: bool = False):
+        self.base_dir = base_dir
+        self.input = input_source
+        self.headless = headless
+        self.pacman: Pacman = None
+        self.entity: int = None
+        self.tick = 0
+        self.mask = 0
+        self.sequence = 0
+        # send times of inputs not yet applied by the server
+        self.pending: dict[int, float] = {}
+        self.latencies: list[float] = []
+        self.bytes_received = 0
+        self.welcome_size = 0
+        self.deltas = 0
+
+    def __set_entities(self, payload: bytes, offset: int, count: int)\
+            -> int:
+        """ Sets 'count' entity states packed in 'payload' from 'offset'.
+        Returns the offset after them. """
+
+        entities = self.pacman.entities
+        for _ in range(count):
+            entity, x, y, direction = ENTITY.unpack_from(payload, offset)
+            offset += ENTITY.size
+            entities.x[entity], entities.y[entity] = x, y
+            entities.directions[entity] = direction & ~MOVING_FLAG
+            entities.moving[entity] = bool(direction & MOVING_FLAG)
+            view = entities.views[entity]
+            view.animation = view.animation_dict[view.direction]
+            view.image = view.animation[view.animation_frame %
+                                        len(view.animation)]
+        return offset
+
+    def __eat_coin(self, index: int) -> Rect:
+        """ Removes the coin from the cell 'index' and its tile from the
+        background. Returns the tile rect. """
+
+        coins = self.pacman.coins
+        row, col = divmod(index, coins.width_units)
+        coins.eat(row, col)
+        return coins.erase(row, col, self.pacman.background,
+                           tuple(self.pacman.defaults['game']['bg_color']))
+
+    def __welcome(self, payload: bytes) -> None:
+        """ Spawns the level of the server and takes its full state. """
+
+        level, self.entity, self.tick, count, cells_size =\
+            WELCOME_HEADER.unpack_from(payload)
+        self.pacman = Pacman(GameState.RUNNING, self.base_dir,
+                             headless=self.headless, level=level)
+        self.pacman.init_gfx()
+        self.pacman.load_textures()
+        self.pacman.spawn_default()
+
+        offset = self.__set_entities(payload, WELCOME_HEADER.size, count)
+        cells = payload[offset:offset + cells_size]
+        for index, (spawned, cell) in enumerate(zip(self.pacman.coins.cells,
+                                                    cells)):
+            if spawned != cell:
+                self.__eat_coin(index)
+        self.pacman.draw()
+        logging.info('Joined as %s at tick %s.',
+                     self.pacman.entities.types[self.entity], self.tick)
+
+    def __apply_delta(self, payload: bytes) -> None:
+        """ Takes a tick of the server and draws the changes. """
+
+        self.tick, applied, count, eaten = DELTA_HEADER.unpack_from(payload)
+        for sequence in [sequence for sequence in self.pending
+                         if sequence <= applied]:
+            self.latencies.append(time.perf_counter() -
+                                  self.pending.pop(sequence))
+
+        offset = self.__set_entities(payload, DELTA_HEADER.size, count)
+        dirty_rects = [self.__eat_coin(COIN.unpack_from(
+            payload, offset + COIN.size * coin)[0]) for coin in range(eaten)]
+        for rect in dirty_rects:
+            self.pacman.screen.blit(self.pacman.background, rect, rect)
+
+        moving_objects = self.pacman.objects['pac'].sprites() +\
+            self.pacman.objects['ghosts'].sprites()
+        self.pacman.animations.step()
+        changed_rects = self.pacman.renderer.render(moving_objects,
+                                                    dirty_rects)
+        if changed_rects and not self.headless:
+            pg.display.update(changed_rects)
+
+    def __send_input(self, writer: asyncio.StreamWriter) -> None:
+        """ Sends the pressed keys if they changed. """
+
+        mask = keys_to_mask(self.input.get_pressed())
+        if mask != self.mask:
+            self.mask = mask
+            self.sequence += 1
+            self.pending[self.sequence] = time.perf_counter()
+            writer.write(frame(INPUT, INPUT_MESSAGE.pack(self.sequence,
+                                                         mask)))
+
+    async def run(self, host: str, port: int) -> None:
+        """ Plays on the server at (host, port) until the server stops, the
+        input source finishes or the window is closed. """
+
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while True:
+                try:
+                    message_type, payload = await read_message(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    logging.info('Server closed the connection.')
+                    return
+                self.bytes_received += HEADER.size + len(payload)
+                if message_type == FULL:
+                    logging.error('Server is full.')
+                    raise SystemExit('Server is full.')
+                if message_type == WELCOME:
+                    self.welcome_size = HEADER.size + len(payload)
+                    self.__welcome(payload)
+                elif message_type == DELTA:
+                    self.__apply_delta(payload)
+                    self.deltas += 1
+
+                if not self.headless and any(
+                        event.type == pg.QUIT for event in pg.event.get()):
+                    return
+                self.__send_input(writer)
+                if self.input.finished:
+                    return
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """ Splits 'host:port', the host defaults to the local host. """
+
+    host, _, port = address.rpartition(':')
+    try:
+        return host or '127.0.0.1', int(port)
+    except ValueError as error:
+        logging.error('Bad address %s.', address)
+        raise SystemExit(f'Bad address {address}.') from error
@@ -1,59 +1,193 @@
 """ Contains the Pacman game class. """
 
+import hashlib
 import logging
 import os
+import random
+import struct
+import time
 from typing import List, Sequence, Tuple
 
 import pygame as pg
 from pygame import Surface, Rect
-from pygame.sprite import RenderUpdates, groupcollide, spritecollideany
+from pygame.sprite import RenderUpdates, groupcollide
 from pygame.event import Event
 from pygame.time import Clock
 
-from aux import loader
+from auxil import loader, level_compiler
+from auxil import log_setup, startup_timing
+from auxil.asset_bundle import AssetBundle
+from auxil.log_setup import FRAME_LOGGER
+from game.animation import AnimationScheduler
+from game.asset_watcher import AssetWatcher
+from game.frame_telemetry import (FrameTelemetry, TelemetryOverlay, WAIT,
+                                  INPUT, EVENTS, UPDATE, OVERLAY, DISPLAY)
 from game.game import Game
+from game.lazy_textures import LazyTextures
+from game.level import Level
 from game.game_state import GameState
+from game.snapshot import GameSnapshot
+from game.input_source import InputSource, KeyboardInput
+from game.coin_field import CoinField
 from game.constants import Constants
-from game.mobile_game_object import MobileGameObject
+from game.distance_field import DistanceField, DIRECTIONS, STEPS
+from game.entity_store import EntityStore
+from game.junction_graph import JunctionGraph
+from game.passability import PassabilityMap, GHOST_BLOCKED
 from game.movement_direction import MovementDirection
-from game.texture_loader import TextureLoader
+from game.texture_loader import TextureLoader, get_family_paths
+from game.renderer import DirtyRenderer
 from game.spawner import Spawner
 
+# hot path events logged every frame
+frame_logger = logging.getLogger(FRAME_LOGGER)
+# defaults applied by hot reload while running, others need a restart
+LIVE_DEFAULTS = [('game', 'object_speed'), ('game', 'animation_fps')]
+
 
 class Pacman(Game):
     """ The Pacman game class. """
 
-    def __init__(self, state: GameState, base_dir: str):
+    def __init__(self, state: GameState, base_dir: str,
+                 headless: bool = False, seed: int = None, level: int = 0,
+                 bundle_path: str = None):
         """ Initializes the Pacman game and loads defaults from
-        defaults.json. """
+        defaults.json, or from the asset bundle in 'bundle_path' together
+        with all the textures. A headless game has no window and runs as
+        fast as possible. All the randomness of the game comes from 'seed',
+        a random one by default. """
 
         super().__init__(state, base_dir)
+        self.headless = headless
         self.assets_dir = os.path.join(self.base_dir, 'assets')
-        self.defaults = loader.load_json_dict(
-            os.path.join(base_dir, 'defaults.json'))
-        self.paths = loader.load_json_dict(
-            os.path.join(base_dir, 'paths.json'))
-        self.constants = Constants(self.defaults)
+        self.bundle: AssetBundle = None
+        with startup_timing.phase('load defaults and paths'):
+            if bundle_path:
+                self.bundle = AssetBundle(bundle_path)
+                self.defaults = self.bundle.defaults
+                self.paths = self.bundle.paths
+            else:
+                self.defaults = loader.load_json_dict(
+                    os.path.join(base_dir, 'defaults.json'))
+                self.paths = loader.load_json_dict(
+                    os.path.join(base_dir, 'paths.json'))
+        with startup_timing.phase('constants'):
+            self.constants = Constants(self.defaults)
+        self.level_data: Level = None
+        self.passability: PassabilityMap = None
+        self.ghost_paths: DistanceField = None
+        self.ghost_junctions: JunctionGraph = None
         self.objects: dict[str, RenderUpdates] = {}
-        self.textures: dict[str, dict[str, list[Surface]]] = None
+        self.textures: dict[str, dict[str, list[Surface]]] |\
+            LazyTextures = None
+        self.texture_loader: TextureLoader = None
+        self.watcher: AssetWatcher = None
+        self.watched_defaults: dict = None
         self.screen: Surface = None
         self.background: Surface = None
+        self.renderer: DirtyRenderer = None
+        # rects changed outside the renderer, shown with the next update
+        self.dirty_rects: list[Rect] = []
+        self.animations: AnimationScheduler = None
         self.spawner: Spawner = None
+        self.coins: CoinField = None
+        self.entities: EntityStore = None
         self.clock: Clock = None
-        self.level = 0
+        self.input: InputSource = None
+        self.telemetry: FrameTelemetry = None
+        self.overlay: TelemetryOverlay = None
+        self.ticks = 0
+        self.ticks_per_second = 0.0
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.random = random.Random(self.seed)
+        self.level = level
+        with startup_timing.phase('load_level'):
+            self.load_level(self.level)
+
+    def load_level(self, level: int) -> None:
+        """ Maps the compiled level number 'level', compiling it first if
+        its maze description changed. """
+
+        try:
+            source_path = os.path.join(
+                self.base_dir, *self.defaults['levels'][level].split('/'))
+        except IndexError as error:
+            logging.error('Level %s not defined.', level)
+            raise SystemExit(f'Level {level} not defined.') from error
+
+        level_data = Level(level_compiler.get_compiled_level(source_path))
+        if (level_data.width_units, level_data.height_units) !=\
+                (self.constants.width_units, self.constants.height_units):
+            logging.error('Level %s does not fit the game size.', level)
+            raise SystemExit(f'Level {level} does not fit the game size.')
+
+        self.level = level
+        self.level_data = level_data
+        self.passability = PassabilityMap.from_level(
+            self.level_data, self.constants.pixels_per_unit)
+        # distance fields are only built once ghosts ask for a target
+        self.ghost_paths = DistanceField(self.passability, GHOST_BLOCKED)
+        # ghosts only decide at junctions and follow corridors in between
+        self.ghost_junctions = JunctionGraph(self.passability, GHOST_BLOCKED)
+
+    def state_hash(self) -> str:
+        """ Returns a hash of the logical game state: the tick, the
+        positions and directions of pac and ghosts and the coins left.
+        Graphics are not part of it. """
+
+        state = hashlib.sha1(struct.pack('<QI', self.ticks, self.level))
+        for group in ('pac', 'ghosts'):
+            for object in self.objects[group].sprites():
+                state.update(struct.pack(
+                    '<iiii?', *object.rect, object.moving))
+                state.update(object.direction.value.encode())
+        state.update(self.coins.cells)
+        return state.hexdigest()
+
+    def snapshot(self) -> GameSnapshot:
+        """ Captures the logical game state: level, game state, ticks,
+        random generator, pac and ghost state and the coins. Sprites,
+        textures and surfaces are left out. """
+
+        return GameSnapshot(self.level, self.state, self.ticks,
+                            self.random.getstate(), self.entities.snapshot(),
+                            self.coins.snapshot())
+
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """ Returns the game to a snapshot taken in the same level. Only the
+        logical state is restored, frames drawn meanwhile are not. """
+
+        if snapshot.level != self.level:
+            logging.error('Cannot restore snapshot of level %s in level %s.',
+                          snapshot.level, self.level)
+            raise SystemExit(f'Cannot restore snapshot of level '
+                             f'{snapshot.level} in level {self.level}.')
+
+        self.state = snapshot.state
+        self.ticks = snapshot.ticks
+        self.random.setstate(snapshot.random_state)
+        self.entities.restore(snapshot.entities)
+        self.coins.restore(snapshot.coins)
 
     def init_gfx(self) -> None:
-        # init pygame
+        # init pygame, headless games use the dummy video driver
+        if self.headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pg.init()
 
-        # init game window
+        # init game window, headless games only draw into a surface
         size = (self.defaults['window']['width'],
                 self.defaults['window']['height'])
-        self.screen = pg.display.set_mode(size, pg.SCALED)
-        self.background = Surface(self.screen.get_size())
-        self.background = self.background.convert()
+        if self.headless:
+            self.screen = Surface(size)
+            self.background = Surface(size)
+        else:
+            self.screen = pg.display.set_mode(size, pg.SCALED)
+            self.background = Surface(self.screen.get_size())
+            self.background = self.background.convert()
         self.background.fill(tuple(self.defaults['game']['bg_color']))
-        pg.display.flip()
+        if not self.headless:
+            pg.display.flip()
 
     def __user_quit(self, event: Event) -> bool:
         return event.type == pg.QUIT or (event.type == pg.KEYDOWN and
@@ -62,63 +196,56 @@ class Pacman(Game):
     def __handle_arrow_key_press(self, keys: dict) -> None:
         """ Handles arrow key press. """
 
-        logging.debug('Handling arrow key input...')
+        frame_logger.debug('Handling arrow key input...')
         if keys[pg.K_UP]:
             direction = MovementDirection.UP
-            vector = (0, -self.defaults['game']['object_speed']['pac'])
-            logging.debug('Key UP pressed.')
+            frame_logger.debug('Key UP pressed.')
         elif keys[pg.K_RIGHT]:
             direction = MovementDirection.RIGHT
-            vector = (self.defaults['game']['object_speed']['pac'], 0)
-            logging.debug('Key RIGHT pressed.')
+            frame_logger.debug('Key RIGHT pressed.')
         elif keys[pg.K_DOWN]:
             direction = MovementDirection.DOWN
-            vector = (0, self.defaults['game']['object_speed']['pac'])
-            logging.debug('Key DOWN pressed.')
+            frame_logger.debug('Key DOWN pressed.')
         elif keys[pg.K_LEFT]:
             direction = MovementDirection.LEFT
-            vector = (-self.defaults['game']['object_speed']['pac'], 0)
-            logging.debug('Key LEFT pressed.')
+            frame_logger.debug('Key LEFT pressed.')
 
-        self.__move_object('pac', vector, direction=direction)
-        logging.debug('Arrow key input handled.')
+        self.move_object('pac', direction)
+        frame_logger.debug('Arrow key input handled.')
 
     def __handle_key_press(self, keys: Sequence[bool]) -> None:
         """ Handles key-pressed events. """
 
-        logging.debug('Handling key press...')
+        frame_logger.debug('Handling key press...')
         if any((keys[pg.K_UP], keys[pg.K_DOWN], keys[pg.K_RIGHT],
                 keys[pg.K_LEFT])):
-            logging.debug('Arrow key pressed.')
+            frame_logger.debug('Arrow key pressed.')
             self.__handle_arrow_key_press(keys)
 
-        logging.debug('Key press handled.')
+        frame_logger.debug('Key press handled.')
 
-    def __object_collides_with_solid(self, object: MobileGameObject) -> bool:
-        """ Simple test if a given object collides with walls or door. """
+    def move_object(self, object_type: str,
+                    direction: MovementDirection) -> None:
+        """ Moves the object of type 'object_type' a step in 'direction' at
+        the speed of pac or normal ghosts unless walls block it. """
 
-        return spritecollideany(object, self.objects['walls']) or\
-            spritecollideany(object, self.objects['prison_door'])
+        speed = self.defaults['game']['object_speed'][
+            'pac' if object_type == 'pac' else 'normal_ghost']
+        row_step, col_step = STEPS[DIRECTIONS.index(direction) - 1]
+        self.__move_object(object_type, (col_step * speed, row_step * speed),
+                           direction=direction)
 
     def __move_object(self, object_type: str, vector: Tuple[int, int],
                       direction: MovementDirection) -> None:
-        logging.debug('Moving object %s by %s...', object_type, vector)
+        frame_logger.debug('Moving object %s by %s...', object_type, vector)
 
         # get MobileGameObject based on object_type
-        if object_type == 'pac':
-            try:
-                object = self.objects['pac'].sprites()[0]
-            except IndexError:
-                logging.error('Pac not initialized. Cannot move.')
-        else:
-            object = [obj for obj in self.objects['ghosts']
-                      if object_type == obj.type]
-            if len(object) != 1:
-                logging.error(
-                    'Error moving %s. No such object initialized. ',
-                    object_type)
-                return
-            object = object[0]
+        entity = self.entities.get_id(object_type)
+        if entity is None:
+            logging.error('Error moving %s. No such object initialized. ',
+                          object_type)
+            return
+        object = self.entities.views[entity]
 
         if object.moving:
             return
@@ -132,36 +259,63 @@ class Pacman(Game):
         object.move(vector, direction=direction)
 
         # if object collides with solid, move it back
-        if self.__object_collides_with_solid(object):
+        if self.entities.is_blocked(entity, self.passability):
             vector = (-vector[0], -vector[1])
             object.move(vector, direction=obj_prev_direction)
 
-        logging.debug('Object %s moved by %s.', object_type, vector)
+        frame_logger.debug('Object %s moved by %s.', object_type, vector)
+
+    def __eat_coins(self) -> list[tuple[int, int]]:
+        """ Eats the coin on the tile under pac's center. Returns the tiles
+        (row, col) of eaten coins. """
+
+        pac = self.objects['pac'].sprites()[0]
+        row = pac.rect.centery // self.defaults['game']['pixels_per_unit']
+        col = pac.rect.centerx // self.defaults['game']['pixels_per_unit']
+        if not self.coins.eat(row, col):
+            return []
+
+        frame_logger.debug('Coin eaten on (%s, %s). %s coins remaining.',
+                           row, col, self.coins.remaining)
+        return [(row, col)]
+
+    def step(self) -> list[tuple[int, int]]:
+        """ Runs the game logic of a tick without drawing anything: pac
+        eats the coin under its center and the moving objects advance.
+        Returns the tiles (row, col) of eaten coins. """
+
+        eaten = self.__eat_coins()
+        # keep moving until whole game units are reached
+        self.entities.advance(self.defaults['game']['pixels_per_unit'])
+        return eaten
 
     def __update_moving_objects(self) -> List[Rect]:
         """ Updates moving objects after their position has changed."""
 
-        logging.debug(
+        frame_logger.debug(
             'Updating moving objects position and drawing changes...')
 
-        changed_rects = []
-        game_unit_size = self.defaults['game']['pixels_per_unit']
-        for moving_object_grp in ['pac', 'ghosts']:
-            # keep moving until whole game units are reached
-            for object in self.objects[moving_object_grp].sprites():
-                if object.moving:
-                    if object.rect.x % game_unit_size or\
-                            object.rect.y % game_unit_size:
-                        object.move()
-                    else:
-                        object.moving = False
-
-                        # draw changes
-            self.objects[moving_object_grp].clear(self.screen, self.background)
-            self.objects[moving_object_grp].update()
-            changed_rects += self.objects[moving_object_grp].draw(self.screen)
-
-        logging.debug('Finished updating moving objects.')
+        bg_color = tuple(self.defaults['game']['bg_color'])
+        eaten_rects = [self.coins.erase(row, col, self.background, bg_color)
+                       for row, col in self.step()]
+        for rect in eaten_rects:
+            self.screen.blit(self.background, rect, rect)
+        eaten_rects += self.dirty_rects
+        self.dirty_rects = []
+        moving_objects = self.objects['pac'].sprites() +\
+            self.objects['ghosts'].sprites()
+
+        # step the animations due, immobile objects are drawn right away
+        moving = set(moving_objects)
+        for object in self.animations.step():
+            if object not in moving:
+                self.screen.blit(object.image, object.rect)
+                eaten_rects.append(object.rect)
+
+        # draw changes
+        changed_rects = self.renderer.render(moving_objects, eaten_rects)
+
+        frame_logger.debug('Finished updating moving objects.')
         return changed_rects
 
     def load_textures(self) -> None:
@@ -175,8 +329,25 @@ class Pacman(Game):
                 'Cannot load textures without initializing graphics.')
 
         # init texture loader
-        txtr_loader = TextureLoader(self.assets_dir, self.defaults, self.paths)
-        self.textures = txtr_loader.load_all_textures()
+        cache_path = None
+        if self.defaults['loader']['texture_cache']:
+            cache_path = os.path.join(
+                self.base_dir, self.defaults['loader']['texture_cache_file'])
+        self.texture_loader = TextureLoader(
+            self.assets_dir, self.defaults, self.paths, cache_path,
+            self.defaults['loader']['texture_workers'],
+            convert=not self.headless, bundle=self.bundle)
+        if self.defaults['loader']['lazy_textures']:
+            self.textures = self.texture_loader.load_lazy_textures()
+        else:
+            self.textures = self.texture_loader.load_all_textures()
+
+    def warm_textures(self) -> None:
+        """ Starts loading the textures not needed so far in the background.
+        Only has effect with lazy texture loading. """
+
+        if isinstance(self.textures, LazyTextures):
+            self.textures.warm()
 
     def spawn_default(self) -> None:
         """ Spawns all the initial objects in the game. """
@@ -189,49 +360,310 @@ class Pacman(Game):
                 'Game textures must be loaded before spawning objects.')
 
         # init spawner
+        background = self.background\
+            if self.defaults['render']['static_layers'] else None
         self.spawner = Spawner(self.textures, self.defaults,
-                               self.objects, self.constants)
+                               self.objects, self.constants, self.level_data,
+                               background)
 
         logging.debug('Spawning immobile objects...')
         self.spawner.spawn_immobile()
+        self.coins = self.spawner.coin_field
+        with startup_timing.phase('draw coins'):
+            self.coins.draw(self.background, self.textures['coin'])
         logging.debug('Immobile objects spawned.')
 
         logging.debug('Spawning mobile objects...')
         self.spawner.spawn_mobile()
+        self.entities = self.spawner.entities
         logging.debug('Mobile objects spawned.')
 
+        # families loaded on demand while spawning are cached at once
+        if isinstance(self.textures, LazyTextures):
+            self.textures.save_cache()
+
+        self.__schedule_animations()
+
+    def __schedule_animations(self) -> None:
+        """ Animates all the objects at the rates of their types. """
+
+        self.animations = AnimationScheduler(
+            self.defaults['game']['animation_fps'],
+            self.defaults['game']['max_fps'])
+        for sprite_group in self.objects.values():
+            for object in sprite_group.sprites():
+                self.animations.add(object)
+
     def draw(self) -> None:
         # objects cannot be drawn without spawning
         if not self.objects:
             logging.error('No objects to draw.')
             raise SystemExit('No objects to draw.')
 
+        # background holds the static layers if they are baked
+        self.screen.blit(self.background, (0, 0))
         for sprite_group in self.objects.values():
             sprite_group.draw(self.screen)
-        pg.display.update()
+        if not self.headless:
+            pg.display.update()
+
+        # moving objects are redrawn only when they change
+        self.renderer = DirtyRenderer(self.screen, self.background)
+        self.renderer.track(self.objects['pac'].sprites() +
+                            self.objects['ghosts'].sprites())
 
     def update(self) -> None:
+        # convert textures warmed in the background meanwhile
+        if isinstance(self.textures, LazyTextures):
+            self.textures.collect_warmed()
+
+        telemetry = self.telemetry
         changed_rects = self.__update_moving_objects()
-        pg.display.update(changed_rects)
+        if telemetry:
+            telemetry.mark(UPDATE)
+            if self.overlay:
+                changed_rects += self.overlay.draw(
+                    self.screen, self.background, changed_rects)
+                telemetry.mark(OVERLAY)
+        if changed_rects and not self.headless:
+            pg.display.update(changed_rects)
+        if telemetry:
+            telemetry.mark(DISPLAY)
 
         # TODO allow movement only on whole units
 
-    def run(self) -> None:
-        # init game clock (FPS)
-        self.clock = Clock()
+    def __get_loaded_family(self, obj: str, family: str | None)\
+            -> dict[str, list[Surface]] | None:
+        """ Returns the textures of the family in use or None if they were
+        not loaded yet. """
+
+        if isinstance(self.textures, LazyTextures):
+            # families decoded in the background may be older than the change
+            self.textures.warming.pop((obj, family), None)
+            return self.textures.loaded.get((obj, family))
+
+        object_textures = self.textures.get(obj)
+        if object_textures is None or family is None:
+            return object_textures
+        return object_textures.get(family)
+
+    def __reload_family(self, obj: str, family: str | None)\
+            -> list[list[Surface]]:
+        """ Loads the textures of the family again and swaps the frames into
+        the animation lists in use, so objects show them without being
+        spawned again. Returns the swapped animation lists. """
+
+        textures = self.__get_loaded_family(obj, family)
+        if textures is None:
+            return []
+
+        try:
+            reloaded = self.texture_loader.reload_family_textures(obj, family)
+        except (SystemExit, OSError) as error:
+            # files saved halfway are loaded again on their next change
+            logging.error('Error reloading %s %s textures, keeping the old '
+                          'ones. Error: %s', obj, family, error)
+            return []
+
+        for animation, frames in reloaded.items():
+            if animation in textures:
+                textures[animation][:] = frames
+            else:
+                textures[animation] = frames
+        return [textures[animation] for animation in reloaded]
+
+    def __reload_defaults(self) -> None:
+        """ Applies the LIVE_DEFAULTS changed in defaults.json. Other changes
+        only take effect after a restart. """
+
+        try:
+            defaults = loader.load_json_dict(
+                os.path.join(self.base_dir, 'defaults.json'))
+        except SystemExit:
+            # the error is logged, the file is read again on its next change
+            return
 
-        running = True
-        while running:
-            # start game clock
-            self.clock.tick(self.defaults['game']['max_fps'])
+        changed = []
+        for section in sorted(set(defaults) | set(self.watched_defaults)):
+            old = self.watched_defaults.get(section)
+            new = defaults.get(section)
+            if isinstance(old, dict) and isinstance(new, dict):
+                changed += [(section, key) for key in sorted(set(old) |
+                                                             set(new))
+                            if old.get(key) != new.get(key)]
+            elif old != new:
+                changed.append((section, None))
+        self.watched_defaults = defaults
+
+        live = [key for key in changed if key in LIVE_DEFAULTS]
+        for section, key in live:
+            self.defaults[section][key] = defaults[section][key]
+        if ('game', 'animation_fps') in live:
+            self.__schedule_animations()
+        if live:
+            logging.info('Applied %s from defaults.json.', ', '.join(
+                f'{section}.{key}' for section, key in live))
+        restart = [key for key in changed if key not in LIVE_DEFAULTS]
+        if restart:
+            logging.warning('Changes of %s in defaults.json take effect '
+                            'after a restart.', ', '.join(
+                                '.'.join(filter(None, key))
+                                for key in restart))
+
+    def __reload_paths(self) -> set[tuple[str, str | None]]:
+        """ Takes the paths changed in paths.json. Returns the texture
+        families whose paths changed. """
+
+        try:
+            paths = loader.load_json_dict(
+                os.path.join(self.base_dir, 'paths.json'))
+        except SystemExit:
+            # the error is logged, the file is read again on its next change
+            return set()
+
+        changed = {(obj, family) for obj, families in
+                   self.watcher.families.items() for family in families
+                   if get_family_paths(self.paths, obj, family) !=
+                   get_family_paths(paths, obj, family)}
+        # the texture loader shares the paths dict
+        self.paths.clear()
+        self.paths.update(paths)
+        return changed
+
+    def __hot_reload(self) -> None:
+        """ Applies the changes of the watched files. Only the changed
+        texture families are loaded again, the background is redrawn only
+        where baked objects use them. """
+
+        changed_files, families = self.watcher.poll()
+        families = set(families)
+        if 'defaults.json' in changed_files:
+            self.__reload_defaults()
+        if 'paths.json' in changed_files:
+            families |= self.__reload_paths()
+        if changed_files:
+            # texture files may have moved with the paths
+            self.watcher.scan()
+        if not families:
+            return
 
-            # handle key events
-            self.__handle_key_press(pg.key.get_pressed())
+        start = time.perf_counter()
+        swapped = []
+        for obj, family in sorted(families, key=str):
+            swapped += self.__reload_family(obj, family)
+        if not swapped:
+            return
+        self.texture_loader.save_cache()
 
-            # get other events
-            for event in pg.event.get():
-                if self.__user_quit(event):
-                    logging.debug('Quit event from user. Exiting...')
-                    running = False
+        for sprite_group in self.objects.values():
+            for object in sprite_group.sprites():
+                object.image = object.animation[object.animation_frame %
+                                                len(object.animation)]
+        bg_color = tuple(self.defaults['game']['bg_color'])
+        redrawn = self.spawner.redraw_static_objects(swapped, bg_color)
+        if ('coin', None) in families:
+            redrawn += self.coins.draw(self.background,
+                                       self.textures['coin'], bg_color)
+        for rect in redrawn:
+            self.screen.blit(self.background, rect, rect)
+
+        # immobile objects not baked into the background are on the screen
+        animation_ids = {id(animation) for animation in swapped}
+        for name, sprite_group in self.objects.items():
+            if name in ('pac', 'ghosts'):
+                continue
+            for object in sprite_group.sprites():
+                if id(object.animation) in animation_ids:
+                    self.screen.blit(object.image, object.rect)
+                    redrawn.append(object.rect)
+
+        # the renderer draws the moving objects over the redrawn rects
+        self.dirty_rects += redrawn
+        logging.info('%s texture families reloaded in %.3f s.',
+                     len(families), time.perf_counter() - start)
+
+    def run(self, input_source: InputSource = None) -> None:
+        """ Runs the game reading keys from 'input_source', the keyboard by
+        default. Headless games are not capped by max_fps and stop once the
+        input source is finished. """
 
-            self.update()
+        # init game clock (FPS)
+        self.clock = Clock()
+        self.input = input_source or KeyboardInput()
+        max_fps = 0 if self.headless else self.defaults['game']['max_fps']
+
+        # frame phases are timed only if telemetry is turned on
+        telemetry_defaults = self.defaults['telemetry']
+        telemetry = None
+        if telemetry_defaults['enabled']:
+            telemetry = self.telemetry = FrameTelemetry(
+                telemetry_defaults['capacity'],
+                1 / self.defaults['game']['max_fps'])
+            if telemetry_defaults['overlay'] and not self.headless:
+                self.overlay = TelemetryOverlay(
+                    telemetry, telemetry_defaults['overlay_refresh'])
+
+        # changed assets and defaults are reloaded while running if asked
+        loader_defaults = self.defaults['loader']
+        reload_interval = loader_defaults['hot_reload_interval']
+        if loader_defaults['hot_reload']:
+            if self.bundle:
+                logging.warning('Hot reload does not work with asset '
+                                'bundles.')
+            else:
+                self.watcher = AssetWatcher(self.base_dir,
+                                            self.texture_loader)
+                self.watched_defaults = loader.load_json_dict(
+                    os.path.join(self.base_dir, 'defaults.json'))
+
+        self.ticks = 0
+        start = time.perf_counter()
+        running = True
+        try:
+            while running:
+                if telemetry:
+                    telemetry.start_frame()
+
+                # start game clock
+                self.clock.tick(max_fps)
+                if telemetry:
+                    telemetry.mark(WAIT)
+
+                # handle key events
+                keys = self.input.get_pressed()
+                if self.input.finished:
+                    logging.debug('Input finished. Exiting...')
+                    break
+                self.__handle_key_press(keys)
+                if telemetry:
+                    telemetry.mark(INPUT)
+
+                # get other events
+                for event in pg.event.get():
+                    if self.__user_quit(event):
+                        logging.debug('Quit event from user. Exiting...')
+                        running = False
+                    elif event.type == pg.KEYDOWN and\
+                            event.key == pg.K_F12:
+                        log_setup.dump_frame_log()
+                if self.watcher and not self.ticks % reload_interval:
+                    self.__hot_reload()
+                if telemetry:
+                    telemetry.mark(EVENTS)
+
+                self.update()
+                self.ticks += 1
+                if telemetry:
+                    telemetry.end_frame()
+        finally:
+            if telemetry and telemetry_defaults['csv_file']:
+                telemetry.dump_csv(os.path.join(
+                    self.base_dir, telemetry_defaults['csv_file']))
+
+        if telemetry:
+            logging.info('Frame telemetry:\n%s',
+                         '\n'.join(telemetry.summary()))
+        elapsed = time.perf_counter() - start
+        self.ticks_per_second = self.ticks / elapsed if elapsed else 0.0
+        logging.info('Ran %s ticks in %.3f s (%.1f ticks per second).',
+                     self.ticks, elapsed, self.ticks_per_second)
@@ -0,0 +1,78 @@
+""" Contains the tile passability map used for solid collisions. """
+
+from pygame import Rect
+
+from game.level import Level
+
+# tile flags, a tile blocks an object if it has the object's flag set
+PAC_BLOCKED = 1
+GHOST_BLOCKED = 2
+ALL_BLOCKED = PAC_BLOCKED | GHOST_BLOCKED
+
+
+class PassabilityMap:
+    """ Bitmap of the maze tiles telling which objects cannot enter
+    a tile. """
+
+    def __init__(self, width_units: int, height_units: int,
+                 pixels_per_unit: int):
+        self.width_units = width_units
+        self.height_units = height_units
+        self.pixels_per_unit = pixels_per_unit
+        self.tiles = bytearray(width_units * height_units)
+
+    @classmethod
+    def from_level(cls, level: Level, pixels_per_unit: int)\
+            -> 'PassabilityMap':
+        """ Copies the precomputed map of a compiled level. """
+
+        passability = cls(level.width_units, level.height_units,
+                          pixels_per_unit)
+        passability.tiles[:] = level.passability
+        return passability
+
+    def add_layer(self, blocks: list[list[int]], flags: int) -> None:
+        """ Sets 'flags' on every tile which is non-zero in 'blocks'. """
+
+        for row, units in enumerate(blocks):
+            offset = row * self.width_units
+            for col, unit in enumerate(units):
+                if unit:
+                    self.tiles[offset + col] |= flags
+
+    def add_tiles(self, tiles: list[tuple[int, int]], flags: int) -> None:
+        """ Sets 'flags' on the tiles given as (row, col). """
+
+        for row, col in tiles:
+            self.tiles[row * self.width_units + col] |= flags
+
+    def clear_tiles(self, tiles: list[tuple[int, int]], flags: int) -> None:
+        """ Clears 'flags' on the tiles given as (row, col). """
+
+        for row, col in tiles:
+            self.tiles[row * self.width_units + col] &= ~flags
+
+    def is_tile_blocked(self, row: int, col: int, flags: int) -> bool:
+        """ Tests if the tile blocks objects with 'flags'. Tiles outside the
+        maze never block. """
+
+        if 0 <= row < self.height_units and 0 <= col < self.width_units:
+            return bool(self.tiles[row * self.width_units + col] & flags)
+        return False
+
+    def is_blocked(self, rect: Rect, flags: int) -> bool:
+        """ Tests if 'rect' overlaps a tile blocking objects with 'flags'.
+        Only the few tiles under the rect are checked. """
+
+        unit = self.pixels_per_unit
+        top = max(rect.top // unit, 0)
+        bottom = min((rect.bottom - 1) // unit, self.height_units - 1)
+        left = max(rect.left // unit, 0)
+        right = min((rect.right - 1) // unit, self.width_units - 1)
+        for row in range(top, bottom + 1):
+            offset = row * self.width_units
+            for col in range(left, right + 1):
+                if self.tiles[offset + col] & flags:
+                    return True
+
+        return False
@@ -0,0 +1,81 @@
+""" Contains the dirty rect renderer of moving objects. """
+
+from pygame import Rect, Surface
+from pygame.sprite import Sprite
+
+
+def merge_rects(rects: list[Rect]) -> list[Rect]:
+    """ Merges overlapping rects until no two rects overlap. """
+
+    merged: list[Rect] = []
+    for rect in rects:
+        rect = Rect(rect)
+        # merging may make the rect overlap rects checked before
+        index = rect.collidelist(merged)
+        while index >= 0:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+
+    return merged
+
+
+class DirtyRenderer:
+    """ Draws only the sprites whose position or image changed since they
+    were last drawn and reports the merged dirty rects. """
+
+    def __init__(self, screen: Surface, background: Surface):
+        self.screen = screen
+        self.background = background
+        self.drawn: dict[Sprite, tuple[Rect, Surface]] = {}
+        self.pixels_pushed = 0
+        self.total_pixels_pushed = 0
+        self.frames = 0
+
+    def track(self, sprites: list[Sprite]) -> None:
+        """ Remembers the current state of sprites drawn by other means. """
+
+        self.drawn = {sprite: (Rect(sprite.rect), sprite.image)
+                      for sprite in sprites}
+
+    def render(self, sprites: list[Sprite], dirty_rects: list[Rect] = None)\
+            -> list[Rect]:
+        """ Redraws the changed sprites in the given order and returns the
+        merged rects to update on the display, together with 'dirty_rects'
+        changed by other means. Returns an empty list if nothing
+        changed. """
+
+        cleared = list(dirty_rects or [])
+        changed = []
+        for sprite in sprites:
+            state = self.drawn.get(sprite)
+            if state and state[0] == sprite.rect and\
+                    state[1] is sprite.image:
+                continue
+            changed.append(sprite)
+            if state:
+                self.screen.blit(self.background, state[0], state[0])
+                cleared.append(state[0])
+            cleared.append(Rect(sprite.rect))
+
+        # removed sprites leave their last rect behind
+        for sprite in set(self.drawn) - set(sprites):
+            rect = self.drawn.pop(sprite)[0]
+            self.screen.blit(self.background, rect, rect)
+            cleared.append(rect)
+
+        self.frames += 1
+        if not cleared:
+            self.pixels_pushed = 0
+            return []
+
+        # unchanged sprites are redrawn where clearing painted over them
+        for sprite in sprites:
+            if sprite in changed or sprite.rect.collidelist(cleared) >= 0:
+                self.screen.blit(sprite.image, sprite.rect)
+                self.drawn[sprite] = (Rect(sprite.rect), sprite.image)
+
+        rects = merge_rects(cleared)
+        self.pixels_pushed = sum(rect.w * rect.h for rect in rects)
+        self.total_pixels_pushed += self.pixels_pushed
+        return rects
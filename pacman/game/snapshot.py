@@ -0,0 +1,18 @@
+""" Contains the snapshot of the logical game state. """
+
+from typing import Any, NamedTuple
+
+from game.game_state import GameState
+
+
+class GameSnapshot(NamedTuple):
+    """ Immutable logical state of a Pacman game. Holds only bytes and
+    plain values, so taking and keeping snapshots is cheap; the coin cells
+    are shared with the game until either changes. """
+
+    level: int
+    state: GameState
+    ticks: int
+    random_state: tuple[Any, ...]
+    entities: tuple[bytes, ...]
+    coins: tuple[bytes, int]
@@ -1,53 +1,198 @@
 """ Contains the textrue loader class. """
 
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pygame import Surface
 
-from aux import loader
+from auxil import loader, startup_timing
+from auxil.asset_bundle import AssetBundle
+from auxil.texture_cache import TextureCache
+from game.lazy_textures import LazyTextures
+
+
+def get_family_paths(paths: dict, obj: str, family: str | None)\
+        -> dict[str, str | dict] | None:
+    """ Returns the texture specs of every animation of the texture family
+    in 'paths' or None if the family is not there. """
+
+    object_paths = paths.get(obj)
+    if family is None or not isinstance(object_paths, dict):
+        return object_paths
+    return object_paths.get(family)
 
 
 class TextureLoader:
     """ Takes care of loading game object textures. """
 
-    def __init__(self, assets_dir: str, defaults: dict, paths: dict):
+    def __init__(self, assets_dir: str, defaults: dict, paths: dict,
+                 cache_path: str = None, workers: int = 0,
+                 convert: bool = True, bundle: AssetBundle = None):
         self.assets_dir = assets_dir
         self.game_defaults = defaults
         self.txtr_paths = paths
+        # bundled textures are taken from the bundle instead of the assets
+        # directory and need no cache
+        self.bundle = bundle
+        # texture cache is disabled without a cache file
+        self.cache = TextureCache(cache_path)\
+            if cache_path and not bundle else None
+        # textures are decoded serially unless more workers are given
+        self.workers = workers
+        # converting needs a display, headless games skip it
+        self.convert = convert
+        self.image_size = (self.game_defaults['game']['pixels_per_unit'],
+                           self.game_defaults['game']['pixels_per_unit'])
+        # scaled sprite sheets shared by the frames cut from them
+        self.sheets: dict[tuple, Surface] = {}
 
-    def __load_object_textures(self, obj: str, types: list[str])\
-            -> dict[str, dict[str, list[Surface]]]:
-        """ Loads and stores the wall textures. """
+    def get_object_families(self, obj: str, types: list[str])\
+            -> list[str | None]:
+        """ Returns the texture families of the object. Mobile objects and
+        walls have a family for every type, immobile objects only have
+        one family denoted by None. """
 
-        logging.debug('Loading %s textures...', obj)
         try:
             object_paths = self.txtr_paths[obj]
-            object_textures = {}
-            image_size = (self.game_defaults['game']['pixels_per_unit'],
-                          self.game_defaults['game']['pixels_per_unit'])
-            for type in types:
-                # mobile objects have dictionaries with animations for every
-                # movement direction
-                if isinstance(object_paths[type], dict):
-                    object_textures[type] = loader.load_textures(
-                        self.assets_dir, object_paths, type, image_size)
-                else:  # immobile objects only have one frame
-                    object_textures = loader.load_textures(
-                        self.assets_dir, self.txtr_paths, obj, image_size)
-                    break
+            # mobile objects have dictionaries with animations for every
+            # movement direction
+            if types and (not isinstance(object_paths[types[0]], dict) or
+                          loader.is_sheet(object_paths[types[0]])):
+                return [None]
         except KeyError as error:
             logging.error('Object %s textures not found.', obj)
             raise SystemExit(f'Object {obj} textures not found.') from error
 
+        return list(types)
+
+    def get_families(self) -> dict[str, list[str | None]]:
+        """ Returns the texture families of all the objects in the game. """
+
+        return {obj: self.get_object_families(obj, types)
+                for obj, types in self.game_defaults['object'].items()}
+
+    def load_family_textures(self, obj: str, family: str | None,
+                             convert: bool = True)\
+            -> dict[str, list[Surface]]:
+        """ Loads the textures of a single object texture family. """
+
+        try:
+            with startup_timing.phase(
+                    ' '.join(['textures', obj] + [family] * bool(family))):
+                if family is None:  # immobile objects only have one frame
+                    assets_paths, key = self.txtr_paths, obj
+                else:
+                    assets_paths, key = self.txtr_paths[obj], family
+                if self.bundle:
+                    return loader.load_bundle_textures(
+                        self.bundle, assets_paths, key, convert)
+                return loader.load_textures(
+                    self.assets_dir, assets_paths, key, self.image_size,
+                    self.cache, convert, self.sheets)
+        except KeyError as error:
+            logging.error('Object %s textures not found.', obj)
+            raise SystemExit(f'Object {obj} textures not found.') from error
+
+    def reload_family_textures(self, obj: str, family: str | None)\
+            -> dict[str, list[Surface]]:
+        """ Loads the textures of a family again after its files changed.
+        Its sprite sheets are decoded again, frame files come from the cache
+        unless they changed. """
+
+        family_paths = get_family_paths(self.txtr_paths, obj, family) or {}
+        sheets = {spec['sheet'] for spec in family_paths.values()
+                  if loader.is_sheet(spec)}
+        for key in [key for key in self.sheets if key[0] in sheets]:
+            del self.sheets[key]
+        return self.load_family_textures(obj, family, self.convert)
+
+    def finish_textures(self, object_textures: dict[str, list[Surface]])\
+            -> dict[str, list[Surface]]:
+        """ Converts textures decoded outside the main thread unless
+        converting is turned off. """
+
+        if self.convert:
+            return loader.convert_textures(object_textures)
+        return object_textures
+
+    def __load_object_textures(self, obj: str, types: list[str])\
+            -> dict[str, dict[str, list[Surface]]]:
+        """ Loads and stores the object textures. """
+
+        logging.debug('Loading %s textures...', obj)
+        object_textures = {}
+        for family in self.get_object_families(obj, types):
+            if family is None:
+                object_textures = self.load_family_textures(
+                    obj, family, self.convert)
+            else:
+                object_textures[family] = self.load_family_textures(
+                    obj, family, self.convert)
+
         logging.debug('%s textures loaded.', obj.capitalize())
         return object_textures
 
+    def __load_all_textures_parallel(self)\
+            -> dict[str, dict[str, list[Surface]]]:
+        """ Decodes and scales all the texture families on a worker pool.
+        Only the conversion to the display format runs in the main thread.
+        """
+
+        textures: dict[str, dict[str, list[Surface]]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                (obj, family, executor.submit(
+                    self.load_family_textures, obj, family, False))
+                for obj, types in self.game_defaults['object'].items()
+                for family in self.get_object_families(obj, types)]
+
+            for obj, family, future in futures:
+                family_textures = self.finish_textures(future.result())
+                if family is None:
+                    textures[obj] = family_textures
+                else:
+                    textures.setdefault(obj, {})[family] = family_textures
+
+        return textures
+
+    def load_cache(self) -> None:
+        """ Reads the texture cache if enabled. """
+
+        if self.cache:
+            with startup_timing.phase('texture cache'):
+                self.cache.load()
+
+    def save_cache(self) -> None:
+        """ Writes new texture cache entries if the cache is enabled. """
+
+        if self.cache:
+            with startup_timing.phase('texture cache save'):
+                self.cache.save()
+
+    def load_lazy_textures(self) -> LazyTextures:
+        """ Returns textures of all the objects in the game which are only
+        loaded when first asked for. """
+
+        logging.debug('Preparing lazy textures...')
+        self.load_cache()
+        return LazyTextures(self)
+
     def load_all_textures(self) -> dict[str, dict[str, list[Surface]]]:
         """ Loads textures for all the objects in the game. """
 
         textures: dict[str, dict[str, list[Surface]]] = {}
-        logging.debug('Loading all textures...')
-        for obj, types in self.game_defaults['object'].items():
-            textures[obj] = self.__load_object_textures(obj, types)
+        mode = f'parallel, {self.workers} workers' if self.workers > 1\
+            else 'serial'
+        logging.debug('Loading all textures (%s)...', mode)
+        start = time.perf_counter()
+        self.load_cache()
+        if self.workers > 1:
+            textures = self.__load_all_textures_parallel()
+        else:
+            for obj, types in self.game_defaults['object'].items():
+                textures[obj] = self.__load_object_textures(obj, types)
+        self.save_cache()
 
-        logging.debug('All textures loaded.')
+        logging.info('All textures loaded in %.3f s (%s).',
+                     time.perf_counter() - start, mode)
         return textures
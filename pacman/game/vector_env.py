@@ -0,0 +1,222 @@
+""" Contains the vectorized environments stepping many games at once for
+bots. """
+
+import logging
+import multiprocessing
+import os
+from array import array
+from multiprocessing.connection import Connection
+
+from auxil import loader, level_compiler
+from game.coin_field import EMPTY, NORMAL, ENERGIZER
+from game.level import Level
+from game.passability import PassabilityMap, PAC_BLOCKED
+
+# actions, the same codes as distance field directions
+NOOP, UP, RIGHT, DOWN, LEFT = range(5)
+ACTION_STEPS = [(0, 0), (0, -1), (1, 0), (0, 1), (-1, 0)]
+# observation of an environment: pac position in pixels, pac tile, coins
+# left and ticks since reset
+OBS_FIELDS = ['pac_x', 'pac_y', 'pac_row', 'pac_col', 'coins', 'ticks']
+OBS_SIZE = len(OBS_FIELDS)
+COIN_REWARDS = {EMPTY: 0, NORMAL: 10, ENERGIZER: 50}
+
+
+class VectorEnv:
+    """ 'num_envs' independent games of a level stepped together. Only the
+    game logic is simulated: pac moves by its speed in the direction of the
+    action unless walls block it, and eats the coin under its center like
+    in the Pacman game. The state of all the games is kept in flat arrays
+    and every step is a single pass over them.
+
+    A game is done once all its coins are eaten or after 'max_ticks' ticks
+    and is reset right away. """
+
+    def __init__(self, base_dir: str, num_envs: int, level: int = 0,
+                 max_ticks: int = 5000):
+        defaults = loader.load_json_dict(
+            os.path.join(base_dir, 'defaults.json'))
+        source_path = os.path.join(
+            base_dir, *defaults['levels'][level].split('/'))
+        level_data = Level(level_compiler.get_compiled_level(source_path))
+
+        self.num_envs = num_envs
+        self.max_ticks = max_ticks
+        self.unit = defaults['game']['pixels_per_unit']
+        # fractions of pixels are dropped like Rect.move does
+        self.speed = int(defaults['game']['object_speed']['pac'] *
+                         self.unit)
+        self.width_units = level_data.width_units
+        self.height_units = level_data.height_units
+        self.passability = PassabilityMap.from_level(level_data,
+                                                     self.unit)
+        self.start_coins = bytes(level_data.coins)
+        self.start_remaining = len(self.start_coins) -\
+            self.start_coins.count(EMPTY)
+        self.start_x = level_data.pac_spawn[1] * self.unit
+        self.start_y = level_data.pac_spawn[0] * self.unit
+
+        self.pac_x = array('i', [self.start_x]) * num_envs
+        self.pac_y = array('i', [self.start_y]) * num_envs
+        self.coins = bytearray(self.start_coins * num_envs)
+        self.remaining = array('i', [self.start_remaining]) * num_envs
+        self.ticks = array('i', [0]) * num_envs
+
+    def __is_blocked(self, x: int, y: int) -> bool:
+        """ Tests if pac at (x, y) overlaps a tile blocking it, see
+        PassabilityMap.is_blocked. """
+
+        unit = self.unit
+        tiles = self.passability.tiles
+        for row in range(max(y // unit, 0),
+                         min((y + unit - 1) // unit, self.height_units - 1)
+                         + 1):
+            offset = row * self.width_units
+            for col in range(max(x // unit, 0),
+                             min((x + unit - 1) // unit,
+                                 self.width_units - 1) + 1):
+                if tiles[offset + col] & PAC_BLOCKED:
+                    return True
+
+        return False
+
+    def reset_env(self, env: int) -> None:
+        """ Starts the game 'env' over. """
+
+        size = len(self.start_coins)
+        self.coins[env * size:(env + 1) * size] = self.start_coins
+        self.pac_x[env] = self.start_x
+        self.pac_y[env] = self.start_y
+        self.remaining[env] = self.start_remaining
+        self.ticks[env] = 0
+
+    def reset(self) -> array:
+        """ Starts all the games over and returns their observations. """
+
+        for env in range(self.num_envs):
+            self.reset_env(env)
+        return self.observe()
+
+    def observe(self) -> array:
+        """ Returns the observations of all the games, OBS_SIZE values per
+        game in the order of OBS_FIELDS. """
+
+        unit, half = self.unit, self.unit // 2
+        observations = []
+        for x, y, remaining, ticks in zip(self.pac_x, self.pac_y,
+                                          self.remaining, self.ticks):
+            observations += (x, y, (y + half) // unit, (x + half) // unit,
+                             remaining, ticks)
+        return array('i', observations)
+
+    def step(self, actions: list[int]) -> tuple[array, array, bytearray]:
+        """ Runs a tick of every game with the action of the game. Returns
+        the observations, rewards and done flags of all the games. Games
+        which are done are observed after being reset. """
+
+        unit, half = self.unit, self.unit // 2
+        width, height = self.width_units, self.height_units
+        size = len(self.start_coins)
+        pac_x, pac_y, coins = self.pac_x, self.pac_y, self.coins
+        rewards = array('i', bytes(4 * self.num_envs))
+        dones = bytearray(self.num_envs)
+        for env, action in enumerate(actions):
+            # moves into walls are taken back
+            step_x, step_y = ACTION_STEPS[action]
+            x = pac_x[env] + step_x * self.speed
+            y = pac_y[env] + step_y * self.speed
+            if action and not self.__is_blocked(x, y):
+                pac_x[env], pac_y[env] = x, y
+
+            # coin under pac's center
+            row = (pac_y[env] + half) // unit
+            col = (pac_x[env] + half) // unit
+            if 0 <= row < height and 0 <= col < width:
+                index = env * size + row * width + col
+                if coins[index]:
+                    rewards[env] = COIN_REWARDS[coins[index]]
+                    coins[index] = EMPTY
+                    self.remaining[env] -= 1
+
+            self.ticks[env] += 1
+            if not self.remaining[env] or self.ticks[env] >= self.max_ticks:
+                dones[env] = True
+                self.reset_env(env)
+
+        return self.observe(), rewards, dones
+
+
+def _run_shard(connection: Connection, base_dir: str, num_envs: int,
+               level: int, max_ticks: int) -> None:
+    """ Steps a shard of environments in a worker process as asked through
+    'connection'. """
+
+    env = VectorEnv(base_dir, num_envs, level, max_ticks)
+    while True:
+        command, actions = connection.recv()
+        if command == 'step':
+            connection.send(env.step(actions))
+        elif command == 'reset':
+            connection.send(env.reset())
+        else:
+            connection.close()
+            return
+
+
+class ShardedVectorEnv:
+    """ Vectorized environments split into shards stepped in parallel by a
+    pool of worker processes. Has the same interface as VectorEnv. """
+
+    def __init__(self, base_dir: str, num_envs: int, workers: int,
+                 level: int = 0, max_ticks: int = 5000):
+        self.num_envs = num_envs
+        workers = max(1, min(workers, num_envs))
+        # shard boundaries, shard sizes differ by one at most
+        self.bounds = [num_envs * shard // workers
+                       for shard in range(workers + 1)]
+        self.connections: list[Connection] = []
+        self.processes: list[multiprocessing.Process] = []
+        logging.debug('Starting %s environment shards...', workers)
+        for start, end in zip(self.bounds, self.bounds[1:]):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_shard, daemon=True,
+                args=(worker_connection, base_dir, end - start, level,
+                      max_ticks))
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def reset(self) -> array:
+        """ Starts all the games over and returns their observations. """
+
+        for connection in self.connections:
+            connection.send(('reset', None))
+        observations = array('i')
+        for connection in self.connections:
+            observations.extend(connection.recv())
+        return observations
+
+    def step(self, actions: list[int]) -> tuple[array, array, bytearray]:
+        """ Sends every shard its actions and joins the results. """
+
+        for connection, start, end in zip(self.connections, self.bounds,
+                                          self.bounds[1:]):
+            connection.send(('step', actions[start:end]))
+        observations, rewards, dones = array('i'), array('i'), bytearray()
+        for connection in self.connections:
+            shard_observations, shard_rewards, shard_dones =\
+                connection.recv()
+            observations.extend(shard_observations)
+            rewards.extend(shard_rewards)
+            dones.extend(shard_dones)
+        return observations, rewards, dones
+
+    def close(self) -> None:
+        """ Stops the worker processes. """
+
+        for connection in self.connections:
+            connection.send(('close', None))
+            connection.close()
+        for process in self.processes:
+            process.join()
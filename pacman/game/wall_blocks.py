@@ -0,0 +1,117 @@
+""" Contains the table-driven classification of wall block types. """
+
+# neighbour bits of the 8-neighbour mask
+NW, N, NE, W, E, SW, S, SE = (1 << bit for bit in range(8))
+
+# edge bits, stored above the neighbour mask in the lookup index
+TOP_EDGE, BOTTOM_EDGE, LEFT_EDGE, RIGHT_EDGE = (1 << bit
+                                                for bit in range(8, 12))
+
+
+def _block_type(index: int) -> str:
+    """ Determines the block type of a wall unit from its lookup index, i.e.
+    its edge bits and the mask of wall neighbours. """
+
+    if index & TOP_EDGE:  # top outer walls
+        if index & LEFT_EDGE:
+            return 'top_left_corner'
+        if index & RIGHT_EDGE:
+            return 'top_right_corner'
+        return 'top'
+
+    if index & BOTTOM_EDGE:  # bottom outer walls
+        if index & LEFT_EDGE:
+            return 'bottom_left_corner'
+        if index & RIGHT_EDGE:
+            return 'bottom_right_corner'
+        return 'bottom'
+
+    if index & (LEFT_EDGE | RIGHT_EDGE):  # left and right outer walls
+        side = 'left' if index & LEFT_EDGE else 'right'
+        if not index & N and not index & S:
+            return 'bottom'
+        if not index & N:
+            return f'top_{side}_corner'
+        if not index & S:
+            return f'bottom_{side}_corner'
+        return side
+
+    if not index & (N | S | E) or not index & (N | S | W):
+        return 'top'
+    if not index & N:
+        if not index & W:
+            return 'top_left_corner'
+        if not index & E:
+            return 'top_right_corner'
+        return 'top'
+    if not index & S:
+        if not index & W:
+            return 'bottom_left_corner'
+        if not index & E:
+            return 'bottom_right_corner'
+        return 'bottom'
+    if not index & W:
+        return 'left'
+    if not index & E:
+        return 'right'
+
+    # joins and insides of walls are bounded from all sides, only
+    # determined by diagonals
+    if not index & NW:
+        return 'bottom_right_join'
+    if not index & NE:
+        return 'bottom_left_join'
+    if not index & SW:
+        return 'top_right_join'
+    if not index & SE:
+        return 'top_left_join'
+    return 'inside'
+
+
+# block type of every combination of edge bits and neighbour mask
+BLOCK_TYPES = [_block_type(index) for index in range(1 << 12)]
+
+# block types in the order of their codes in compiled levels, 0 is no wall
+BLOCK_TYPE_NAMES = [None, 'top', 'bottom', 'left', 'right',
+                    'top_left_corner', 'top_right_corner',
+                    'bottom_left_corner', 'bottom_right_corner',
+                    'top_left_join', 'top_right_join', 'bottom_left_join',
+                    'bottom_right_join', 'inside']
+BLOCK_TYPE_CODES = {name: code for code, name in enumerate(BLOCK_TYPE_NAMES)}
+
+
+def classify_wall_blocks(wall_blocks: list[list[int]])\
+        -> list[list[str | None]]:
+    """ Returns the block type of every wall unit in 'wall_blocks' in one
+    pass. Units without a wall are None. """
+
+    height = len(wall_blocks)
+    width = len(wall_blocks[0]) if height else 0
+
+    # pad the grid with empty units so that every unit has 8 neighbours
+    padded = [[0] * (width + 2)] +\
+        [[0] + [1 if unit else 0 for unit in row] + [0]
+         for row in wall_blocks] +\
+        [[0] * (width + 2)]
+
+    block_types = []
+    for row in range(height):
+        above, current, below = padded[row], padded[row + 1], padded[row + 2]
+        edges = (TOP_EDGE if row == 0 else 0) |\
+            (BOTTOM_EDGE if row == height - 1 else 0)
+        row_types = []
+        for col in range(width):
+            if not current[col + 1]:
+                row_types.append(None)
+                continue
+            index = edges |\
+                (LEFT_EDGE if col == 0 else 0) |\
+                (RIGHT_EDGE if col == width - 1 else 0) |\
+                above[col] * NW | above[col + 1] * N |\
+                above[col + 2] * NE | current[col] * W |\
+                current[col + 2] * E | below[col] * SW |\
+                below[col + 1] * S | below[col + 2] * SE
+            row_types.append(BLOCK_TYPES[index])
+        block_types.append(row_types)
+
+    return block_types